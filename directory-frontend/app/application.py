@@ -2,28 +2,49 @@
 Demo Flask application - Dog Events Tracker
 """
 import os
+import re
+import sys
+import string
+import socket
 import json
-import uuid
+import time
 from datetime import datetime, timezone
-from flask import Flask, render_template, url_for, redirect, flash, g, request
+from flask import Flask, render_template, url_for, redirect, flash, request, abort
+from markupsafe import Markup
 from flask_wtf import FlaskForm
-from wtforms import StringField, HiddenField, validators, PasswordField, SelectField, DateTimeField
+from wtforms import StringField, HiddenField, validators, PasswordField, SelectField, DateTimeLocalField
+from wtforms.validators import ValidationError
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event as sa_event
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.exceptions import HTTPException
+from sqlalchemy.orm import load_only, undefer
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from flask_caching import Cache
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 import bcrypt
+import atexit
+import queue
+from concurrent.futures import ThreadPoolExecutor
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from config import config
+from util import random_hex_bytes, set_sqlite_pragmas, OrjsonProvider
 
 # Create Flask app
 application = Flask(__name__)
+application.json = OrjsonProvider(application)
 
 # Load configuration based on environment
 config_name = os.getenv('FLASK_ENV', 'default')
 application.config.from_object(config[config_name])
 
+# Configure samesite cookies once at startup if we are served over SSL
+if application.config['PREFERRED_URL_SCHEME'] == 'https':
+    application.config['SESSION_COOKIE_SAMESITE'] = "None"
+    application.config['SESSION_COOKIE_SECURE'] = True
+
 # Configure logging for production
 if not application.debug:
     # Production logging configuration
@@ -40,28 +61,36 @@ if not application.debug:
         '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
     ))
     file_handler.setLevel(getattr(logging, application.config['LOG_LEVEL']))
-    application.logger.addHandler(file_handler)
     
     # Console handler for production
     console_handler = logging.StreamHandler()
     console_handler.setLevel(getattr(logging, application.config['LOG_LEVEL']))
     console_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
-    application.logger.addHandler(console_handler)
+    
+    # Hand records to a background thread so request threads never block on file I/O
+    log_queue = queue.Queue(-1)
+    log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    log_listener.start()
+    atexit.register(log_listener.stop)  # flush pending records on exit
+    application.logger.addHandler(QueueHandler(log_queue))
     
     application.logger.setLevel(getattr(logging, application.config['LOG_LEVEL']))
     application.logger.info('Dog Events Tracker startup')
 
-# Initialize SQLAlchemy
-db = SQLAlchemy()
+# Initialize SQLAlchemy, bound to the app straight away
+db = SQLAlchemy(application)
 
 # Initialize rate limiter with configurable limits
 limiter = Limiter(
     app=application,
     key_func=get_remote_address,
     default_limits=application.config['DEFAULT_RATE_LIMITS'].split(','),
-    storage_uri="memory://"
+    storage_uri=application.config['RATELIMIT_STORAGE_URI']
 )
 
+# Initialize cache for read-mostly lookups
+cache = Cache(application)
+
 # Initialize Flask-Login
 login_manager = LoginManager()
 login_manager.init_app(application)
@@ -69,6 +98,38 @@ login_manager.login_view = 'login'
 login_manager.login_message = 'Please log in to access this page.'
 login_manager.login_message_category = 'info'
 
+# bcrypt's C extension releases the GIL while hashing, so running it on a pool
+# lets other request threads progress and caps concurrent hashes at core count
+BCRYPT_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='bcrypt')
+atexit.register(BCRYPT_POOL.shutdown)
+
+# bcrypt cost setting per kind of secret
+SECRET_ROUNDS_CONFIG = {
+    'password': 'PASSWORD_BCRYPT_ROUNDS',
+    'token': 'TOKEN_BCRYPT_ROUNDS'
+}
+
+def hash_secret(value, kind):
+    """Hash a secret with the bcrypt cost configured for its kind, returning bytes
+    
+    Use kind='password' only for user passwords. Session/reset tokens and API
+    keys are high-entropy and short-lived, so hash them with kind='token'
+    rather than paying the password cost on every check.
+    """
+    rounds = application.config[SECRET_ROUNDS_CONFIG[kind]]
+    return BCRYPT_POOL.submit(bcrypt.hashpw, value.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).result()
+
+def check_secret(value, hashed):
+    """Check a secret against a bcrypt hash on the bcrypt pool"""
+    return BCRYPT_POOL.submit(bcrypt.checkpw, value.encode('utf-8'), hashed).result()
+
+def hash_secrets(values, kind):
+    """Hash several secrets of one kind in parallel, returning hashes in input order"""
+    rounds = application.config[SECRET_ROUNDS_CONFIG[kind]]
+    futures = [BCRYPT_POOL.submit(bcrypt.hashpw, value.encode('utf-8'), bcrypt.gensalt(rounds=rounds))
+               for value in values]
+    return [future.result() for future in futures]
+
 # User model for authentication
 class User(UserMixin, db.Model):
     """User model for authentication"""
@@ -77,7 +138,7 @@ class User(UserMixin, db.Model):
     id = db.Column(db.String(36), primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.LargeBinary(60), nullable=False)  # raw bcrypt output, no re-encoding on login
     full_name = db.Column(db.String(100), nullable=False)
     role = db.Column(db.String(20), default='employee')  # admin, manager, employee
     is_active = db.Column(db.Boolean, default=True)
@@ -85,12 +146,16 @@ class User(UserMixin, db.Model):
     
     def set_password(self, password):
         """Hash and set password"""
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        self.password_hash = hash_secret(password, 'password')
     
     def check_password(self, password):
         """Check if password matches hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        return check_secret(password, self.password_hash)
+    
+    def password_needs_rehash(self):
+        """Check if the stored hash uses a lower cost than the configured one"""
+        # bcrypt hashes look like $2b$<cost>$<salt+hash>; never re-hash down to a cheaper cost
+        return int(self.password_hash.split(b'$')[2]) < application.config['PASSWORD_BCRYPT_ROUNDS']
     
     def __repr__(self):
         return f'<User {self.username}>'
@@ -106,8 +171,8 @@ class Dog(db.Model):
     size = db.Column(db.String(20), nullable=False)  # Small, Medium, Large
     breed_type = db.Column(db.String(100), nullable=False)
     
-    # Relationship to events
-    events = db.relationship('Event', backref='dog', lazy=True, cascade='all, delete-orphan')
+    # Relationship to events - lazy loads raise, so callers must eager-load (N+1 guard)
+    events = db.relationship('Event', back_populates='dog', cascade='all, delete-orphan', lazy='raise_on_sql')
     
     def to_dict(self):
         """Convert dog to dictionary format"""
@@ -119,27 +184,41 @@ class Dog(db.Model):
             'breed_type': self.breed_type
         }
 
+# Characters of an event's notes shown in the dog page's event table
+NOTES_PREVIEW_CHARS = 100
+
 # Event model for SQLite
 class Event(db.Model):
     """Event model for SQLite"""
     __tablename__ = 'events'
+    __table_args__ = (
+        # Serves the per-dog "latest events" lookups without a separate sort
+        db.Index('ix_events_dog_ts', 'dog_id', 'timestamp'),
+    )
     
     id = db.Column(db.String(36), primary_key=True)
     dog_id = db.Column(db.String(36), db.ForeignKey('dogs.id'), nullable=False)
     event_type = db.Column(db.String(50), nullable=False)  # walk, poop, pee, vomit, nap
-    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.now(timezone.utc))
+    timestamp = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
     end_timestamp = db.Column(db.DateTime, nullable=True)
     location = db.Column(db.String(200), nullable=True)  # Optional location
     notes = db.Column(db.Text, nullable=True)  # Optional notes
     bristol_stool_scale = db.Column(db.Integer, nullable=True)  # 1-7 for poop events
     
-    def to_dict(self):
-        """Convert event to dictionary format"""
+    # Short excerpt of notes for list views, and whether it cut anything off - only loaded when undeferred
+    notes_preview = db.column_property(db.func.substr(notes, 1, NOTES_PREVIEW_CHARS), deferred=True)
+    notes_truncated = db.column_property(db.func.length(notes) > NOTES_PREVIEW_CHARS, deferred=True)
+    
+    # Relationship to dog
+    dog = db.relationship('Dog', back_populates='events', lazy='raise_on_sql')
+    
+    def to_dict(self, summary=False):
+        """Convert event to dictionary format (summary=True swaps notes for notes_preview/notes_truncated)"""
         duration = None
         if self.end_timestamp and self.timestamp:
             duration = (self.end_timestamp - self.timestamp).total_seconds() / 60  # in minutes
         
-        return {
+        data = {
             'id': self.id,
             'dog_id': self.dog_id,
             'event_type': self.event_type,
@@ -147,14 +226,47 @@ class Event(db.Model):
             'end_timestamp': self.end_timestamp.isoformat() if self.end_timestamp else None,
             'duration': duration,
             'location': self.location,
-            'notes': self.notes,
             'bristol_stool_scale': self.bristol_stool_scale
         }
+        if summary:
+            data['notes_preview'] = self.notes_preview
+            data['notes_truncated'] = bool(self.notes_truncated)
+        else:
+            data['notes'] = self.notes
+        return data
+
+def list_dog_dicts():
+    """All dogs shaped like Dog.to_dict(), read as plain rows without building ORM objects"""
+    columns = (Dog.id, Dog.name, Dog.approx_age, Dog.size, Dog.breed_type)
+    return [row._asdict() for row in db.session.execute(db.select(*columns))]
+
+@cache.memoize(timeout=application.config['DOG_CACHE_TIMEOUT'])
+def get_dog_choices():
+    """(id, name) pairs for the event form's dog dropdown"""
+    return [(dog_id, name) for dog_id, name in Dog.query.with_entities(Dog.id, Dog.name)]
+
+API_DOGS_CACHE_KEY = 'api_dogs_body'
+DOG_CARDS_CACHE_KEY = 'dog_cards_html:{role}'
+
+def invalidate_dog_cache():
+    """Drop cached dog lists - call after any dog is added, changed or deleted"""
+    cache.delete_memoized(get_dog_choices)
+    cache.delete(API_DOGS_CACHE_KEY)
+    cache.delete_many(*(DOG_CARDS_CACHE_KEY.format(role=role) for role in USER_ROLES))
+
+def render_dog_cards(role):
+    """Home page dog grid as HTML - it varies only by role, so it is cached per role"""
+    key = DOG_CARDS_CACHE_KEY.format(role=role)
+    html = cache.get(key)
+    if html is None:
+        html = render_template('dog-cards.html', dogs=list_dog_dicts(), dog_sizes=dog_sizes, role=role)
+        cache.set(key, html, timeout=application.config['DOG_CACHE_TIMEOUT'])
+    return Markup(html)
 
 # User loader for Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(user_id)
+    return db.session.get(User, user_id)
 
 # Event types definition
 event_types = {
@@ -172,6 +284,57 @@ dog_sizes = {
     "large": "Large"
 }
 
+USER_ROLES = ('admin', 'manager', 'employee')
+
+# Select field choices, built once and shared by every form instance
+DOG_SIZE_CHOICES = tuple(dog_sizes.items())
+EVENT_TYPE_CHOICES = tuple(event_types.items())
+BRISTOL_SCALE_CHOICES = (
+    ('', 'Not applicable'),
+    ('1', '1 - Separate hard lumps (constipation)'),
+    ('2', '2 - Sausage-like but lumpy'),
+    ('3', '3 - Sausage-like with cracks'),
+    ('4', '4 - Sausage-like, smooth and soft'),
+    ('5', '5 - Soft blobs with clear-cut edges'),
+    ('6', '6 - Mushy consistency, ragged edges'),
+    ('7', '7 - Entirely liquid (diarrhea)')
+)
+
+# Form validation patterns, compiled once at import. The character classes are
+# ASCII-only, so re.ASCII lets \s skip Unicode whitespace lookups
+NAME_RE = re.compile(r'^[a-zA-Z\s\-\'\.]+$', re.ASCII)
+AGE_RE = re.compile(r'^[a-zA-Z0-9\s\-\'\.]+$', re.ASCII)
+BREED_RE = re.compile(r'^[a-zA-Z\s\-\'\.\,\&]+$', re.ASCII)
+USERNAME_RE = re.compile(r'^[a-zA-Z0-9_-]+$', re.ASCII)
+# Password character classes, ASCII-only like the old [a-z]/[A-Z]/\d policy
+# (str.isupper()/isdigit() would also accept letters like 'É' and digits like '٣')
+PASSWORD_LOWER = frozenset(string.ascii_lowercase)
+PASSWORD_UPPER = frozenset(string.ascii_uppercase)
+PASSWORD_DIGITS = frozenset(string.digits)
+PASSWORD_SYMBOLS = frozenset("@$!%*?&")
+
+# Value format of <input type="datetime-local">. The first strptime call in a
+# process imports the _strptime module, so pay that once here rather than on
+# the first event submit.
+DATETIME_LOCAL_FORMAT = '%Y-%m-%dT%H:%M'
+datetime.strptime("2000-01-01T00:00", DATETIME_LOCAL_FORMAT)
+
+def strong_password(form, field):
+    """Require a lowercase letter, an uppercase letter, a digit and a symbol"""
+    # Single pass over the password instead of one scan per character class
+    has_lower = has_upper = has_digit = has_symbol = False
+    for c in field.data or '':
+        if c in PASSWORD_LOWER:
+            has_lower = True
+        elif c in PASSWORD_UPPER:
+            has_upper = True
+        elif c in PASSWORD_DIGITS:
+            has_digit = True
+        elif c in PASSWORD_SYMBOLS:
+            has_symbol = True
+    if not (has_lower and has_upper and has_digit and has_symbol):
+        raise ValidationError("Password must contain at least one uppercase letter, one lowercase letter, one number, and one special character")
+
 ### FlaskForm set up
 class DogForm(FlaskForm):
     """flask_wtf form class for dogs with enhanced validation"""
@@ -187,7 +350,7 @@ class DogForm(FlaskForm):
                 message="Dog name must be between 2 and 100 characters"
             ),
             validators.Regexp(
-                r'^[a-zA-Z\s\-\'\.]+$',
+                NAME_RE,
                 message="Dog name can only contain letters, spaces, hyphens, apostrophes, and periods"
             )
         ],
@@ -208,7 +371,7 @@ class DogForm(FlaskForm):
                 message="Age must be between 2 and 50 characters"
             ),
             validators.Regexp(
-                r'^[a-zA-Z0-9\s\-\'\.]+$',
+                AGE_RE,
                 message="Age can only contain letters, numbers, spaces, hyphens, apostrophes, and periods"
             )
         ],
@@ -224,7 +387,7 @@ class DogForm(FlaskForm):
         [
             validators.InputRequired(message="Size is required")
         ],
-        choices=[('small', 'Small'), ('medium', 'Medium'), ('large', 'Large')],
+        choices=DOG_SIZE_CHOICES,
         render_kw={
             "class": "form-control"
         }
@@ -240,7 +403,7 @@ class DogForm(FlaskForm):
                 message="Breed/Type must be between 2 and 100 characters"
             ),
             validators.Regexp(
-                r'^[a-zA-Z\s\-\'\.\,\&]+$',
+                BREED_RE,
                 message="Breed/Type can only contain letters, spaces, hyphens, apostrophes, periods, commas, and ampersands"
             )
         ],
@@ -271,30 +434,31 @@ class EventForm(FlaskForm):
         [
             validators.InputRequired(message="Event type is required")
         ],
-        choices=[('walk', 'Walk'), ('poop', 'Poop'), ('pee', 'Pee'), ('vomit', 'Vomit'), ('nap', 'Nap')],
+        choices=EVENT_TYPE_CHOICES,
         render_kw={
             "class": "form-control"
         }
     )
     
-    timestamp = DateTimeField(
+    timestamp = DateTimeLocalField(
         u'Start Time',
         [
             validators.InputRequired(message="Start time is required")
         ],
-        format='%Y-%m-%dT%H:%M',
+        format=DATETIME_LOCAL_FORMAT,
         render_kw={
-            "class": "form-control",
-            "type": "datetime-local"
+            "class": "form-control"
         }
     )
     
-    end_timestamp = DateTimeField(
+    end_timestamp = DateTimeLocalField(
         u'End Time (Optional)',
-        format='%Y-%m-%dT%H:%M',
+        [
+            validators.Optional()
+        ],
+        format=DATETIME_LOCAL_FORMAT,
         render_kw={
-            "class": "form-control",
-            "type": "datetime-local"
+            "class": "form-control"
         }
     )
     
@@ -333,16 +497,7 @@ class EventForm(FlaskForm):
         [
             validators.Optional()
         ],
-        choices=[
-            ('', 'Not applicable'),
-            ('1', '1 - Separate hard lumps (constipation)'),
-            ('2', '2 - Sausage-like but lumpy'),
-            ('3', '3 - Sausage-like with cracks'),
-            ('4', '4 - Sausage-like, smooth and soft'),
-            ('5', '5 - Soft blobs with clear-cut edges'),
-            ('6', '6 - Mushy consistency, ragged edges'),
-            ('7', '7 - Entirely liquid (diarrhea)')
-        ],
+        choices=BRISTOL_SCALE_CHOICES,
         render_kw={
             "class": "form-control"
         }
@@ -395,7 +550,7 @@ class UserForm(FlaskForm):
                 message="Username must be between 3 and 80 characters"
             ),
             validators.Regexp(
-                r'^[a-zA-Z0-9_-]+$',
+                USERNAME_RE,
                 message="Username can only contain letters, numbers, underscores, and hyphens"
             )
         ],
@@ -434,7 +589,7 @@ class UserForm(FlaskForm):
                 message="Full name must be between 2 and 100 characters"
             ),
             validators.Regexp(
-                r'^[a-zA-Z\s\-\'\.]+$',
+                NAME_RE,
                 message="Full name can only contain letters, spaces, hyphens, apostrophes, and periods"
             )
         ],
@@ -453,10 +608,7 @@ class UserForm(FlaskForm):
                 min=8,
                 message="Password must be at least 8 characters"
             ),
-            validators.Regexp(
-                r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]',
-                message="Password must contain at least one uppercase letter, one lowercase letter, one number, and one special character"
-            )
+            strong_password
         ],
         render_kw={
             "placeholder": "Enter password (min 8 chars, mixed case, numbers, symbols)",
@@ -470,7 +622,7 @@ class UserForm(FlaskForm):
         [
             validators.InputRequired(message="Role is required"),
             validators.AnyOf(
-                ['admin', 'manager', 'employee'],
+                USER_ROLES,
                 message="Role must be admin, manager, or employee"
             )
         ],
@@ -479,18 +631,14 @@ class UserForm(FlaskForm):
         }
     )
 
-@application.before_request
-def before_request():
-    "Set up globals referenced in jinja templates"
-    try:
-        g.hostname = os.uname().nodename
-    except:
-        g.hostname = "localhost"
-    
-    # Configure samesite cookies if we are on SSL
-    if request.scheme == "https":
-        application.config['SESSION_COOKIE_SAMESITE'] = "None"
-        application.config['SESSION_COOKIE_SECURE'] = True
+# The hostname doesn't change for the life of the process, so look it up once
+try:
+    HOSTNAME = socket.gethostname()
+except OSError:
+    HOSTNAME = "localhost"
+
+# Expose it to every template without a per-request hook
+application.jinja_env.globals['hostname'] = HOSTNAME
 
 def init_sample_data():
     """Initialize sample dog data"""
@@ -511,15 +659,14 @@ def init_sample_data():
         }
     ]
     
-    for dog_data in sample_dogs:
-        dog = Dog(**dog_data)
-        db.session.add(dog)
-    
     try:
+        # One executemany INSERT rather than a unit-of-work flush per object
+        db.session.execute(db.insert(Dog), sample_dogs)
         db.session.commit()
+        invalidate_dog_cache()
         application.logger.info("Sample dog data initialized successfully")
     except Exception as e:
-        application.logger.error(f"Error initializing sample dog data: {e}")
+        application.logger.error("Error initializing sample dog data: %s", e)
         db.session.rollback()
 
 def init_sample_events():
@@ -557,15 +704,12 @@ def init_sample_events():
         }
     ]
     
-    for event_data in sample_events:
-        event = Event(**event_data)
-        db.session.add(event)
-    
     try:
+        db.session.execute(db.insert(Event), sample_events)
         db.session.commit()
         application.logger.info("Sample event data initialized successfully")
     except Exception as e:
-        application.logger.error(f"Error initializing sample event data: {e}")
+        application.logger.error("Error initializing sample event data: %s", e)
         db.session.rollback()
 
 def init_sample_users():
@@ -575,78 +719,159 @@ def init_sample_users():
         application.logger.info("Admin user already exists")
         return
     
-    # Create admin user
-    admin_user = User(
-        id=f"user-{str(uuid.uuid4())[:8]}",
-        username='admin',
-        email='admin@company.com',
-        full_name='System Administrator',
-        role='admin'
-    )
-    admin_user.set_password('Admin123!')
-    
-    # Create sample employee user
-    employee_user = User(
-        id=f"user-{str(uuid.uuid4())[:8]}",
-        username='employee',
-        email='employee@company.com',
-        full_name='Sample Employee',
-        role='employee'
-    )
-    employee_user.set_password('Employee123!')
+    # Rows go in as one executemany INSERT, so hash here instead of via set_password
+    admin_hash, employee_hash = hash_secrets(['Admin123!', 'Employee123!'], 'password')
+    sample_users = [
+        {
+            'id': f"user-{random_hex_bytes(4)}",
+            'username': 'admin',
+            'email': 'admin@company.com',
+            'full_name': 'System Administrator',
+            'role': 'admin',
+            'password_hash': admin_hash
+        },
+        {
+            'id': f"user-{random_hex_bytes(4)}",
+            'username': 'employee',
+            'email': 'employee@company.com',
+            'full_name': 'Sample Employee',
+            'role': 'employee',
+            'password_hash': employee_hash
+        }
+    ]
     
     try:
-        db.session.add(admin_user)
-        db.session.add(employee_user)
+        db.session.execute(db.insert(User), sample_users)
         db.session.commit()
         application.logger.info("Sample user accounts initialized successfully")
         application.logger.info("Admin credentials: admin / Admin123!")
         application.logger.info("Employee credentials: employee / Employee123!")
     except Exception as e:
-        application.logger.error(f"Error initializing sample users: {e}")
+        application.logger.error("Error initializing sample users: %s", e)
         db.session.rollback()
 
+# Lowest password cost calibration will suggest, however slow the host looks
+MIN_PASSWORD_BCRYPT_ROUNDS = 10
+
+def calibrate_bcrypt_rounds(target_ms):
+    """Find the largest bcrypt cost (at least MIN_PASSWORD_BCRYPT_ROUNDS) that hashes within target_ms on this host"""
+    rounds = MIN_PASSWORD_BCRYPT_ROUNDS
+    for candidate in range(MIN_PASSWORD_BCRYPT_ROUNDS + 1, 32):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"x" * 16, bcrypt.gensalt(rounds=candidate))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms > target_ms:
+            break
+        rounds = candidate
+    return rounds
+
 def init_app():
     """Initialize the application"""
+    application.logger.info("Using bcrypt cost factor %s", application.config['PASSWORD_BCRYPT_ROUNDS'])
+    
     with application.app_context():
-        # Initialize SQLAlchemy
-        db.init_app(application)
+        if db.engine.dialect.name == 'sqlite':
+            sa_event.listen(db.engine, 'connect', set_sqlite_pragmas)
         
-        # Create tables and initialize data
+        # Open the first pooled connection now rather than on the first request
+        try:
+            db.engine.connect().close()
+        except SQLAlchemyError as e:
+            application.logger.error("Database connection error: %s", e)
+
+def upgrade_password_hash_column():
+    """Convert password hashes stored as text by older releases to the bytes bcrypt expects"""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        # SQLite keeps each value's own storage class, so old rows stay TEXT under the new column type
+        db.session.execute(db.text(
+            "UPDATE users SET password_hash = CAST(password_hash AS BLOB) "
+            "WHERE typeof(password_hash) = 'text'"
+        ))
+    elif dialect == 'postgresql':
+        column_type = db.session.scalar(db.text(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = 'users' AND column_name = 'password_hash'"
+        ))
+        if column_type != 'bytea':
+            db.session.execute(db.text(
+                "ALTER TABLE users ALTER COLUMN password_hash TYPE bytea "
+                "USING convert_to(password_hash, 'UTF8')"
+            ))
+    db.session.commit()
+
+def init_db():
+    """Create missing tables and indexes, then load sample data into empty tables"""
+    with application.app_context():
         try:
             db.create_all()
+            # create_all() skips tables that already exist, so add indexes introduced since
+            for index in Event.__table__.indexes:
+                index.create(db.engine, checkfirst=True)
+            # ...and convert columns whose type changed since
+            upgrade_password_hash_column()
             
-            # Initialize sample data if tables are empty
-            if Dog.query.count() == 0:
+            # Initialize sample data if tables are empty (a one-row probe, not a COUNT(*) scan)
+            if db.session.query(Dog.id).first() is None:
                 init_sample_data()
             
-            if Event.query.count() == 0:
+            if db.session.query(Event.id).first() is None:
                 init_sample_events()
             
-            if User.query.count() == 0:
+            if db.session.query(User.id).first() is None:
                 init_sample_users()
                 
         except Exception as e:
-            application.logger.error(f"Database initialization error: {e}")
+            application.logger.error("Database initialization error: %s", e)
+
+@application.cli.command("calibrate-bcrypt")
+def calibrate_bcrypt_command():
+    """Print the bcrypt cost to set as PASSWORD_BCRYPT_ROUNDS for this host"""
+    # Each cost step doubles hashing time; run this once on an idle production host
+    # and put the result in the deployment's config, so every worker uses the same cost
+    rounds = calibrate_bcrypt_rounds(application.config['BCRYPT_TARGET_MS'])
+    print(f"PASSWORD_BCRYPT_ROUNDS={rounds}")
+
+@application.cli.command("init-db")
+def init_db_command():
+    """Create missing tables and indexes and load sample data"""
+    init_db()
 
 # Initialize the app
 init_app()
 
+# Deployments that run `flask init-db` once set SKIP_DB_INIT so workers don't repeat it on every start.
+# The init-db command also implies it: the command runs init_db() itself once the app is loaded
+if not application.config['SKIP_DB_INIT'] and 'init-db' not in sys.argv[1:]:
+    init_db()
+
+# Compared against when a login names an unknown user, so misses cost as much as bad passwords
+DUMMY_PASSWORD_HASH = hash_secret(random_hex_bytes(16), 'password')
+
+@application.errorhandler(404)
+def not_found_handler(error):
+    """Render misses in place - API callers get the JSON envelope, pages get error.html"""
+    if request.path.startswith('/api/'):
+        return {'success': False, 'error': error.description}, 404
+    return render_template('error.html', error=error.description), 404
+
 @application.errorhandler(Exception)
 def all_exception_handler(error):
-    application.logger.error(f"Error: {error}")
+    # Aborts, rate limits and bad methods keep their own status
+    if isinstance(error, HTTPException):
+        return error
+    # Logged lazily through the app logger (queued to a background thread in production)
+    application.logger.error("Unhandled error on %s: %s", request.path, error, exc_info=error)
+    if request.path.startswith('/api/'):
+        return {'success': False, 'error': 'Internal server error'}, 500
     return render_template('error.html', error="An error occurred"), 500
 
 @application.route("/")
 @login_required
 def home():
     "Home screen - list of dogs"
-    try:
-        dogs = [dog.to_dict() for dog in Dog.query.all()]
-        return render_template('home.html', dogs=dogs, dog_sizes=dog_sizes)
-    except Exception as e:
-        flash(f'Error loading dogs: {str(e)}', 'error')
-        return render_template('error.html')
+    # Only the dog grid is cached; the page around it has the user's name and flashes
+    return render_template('home.html', dog_cards=render_dog_cards(current_user.role))
 
 @application.route("/login", methods=["GET", "POST"])
 @limiter.limit(application.config['LOGIN_RATE_LIMIT'])
@@ -659,8 +884,16 @@ def login():
     if form.validate_on_submit():
         try:
             user = User.query.filter_by(username=form.username.data).first()
-            if user and user.check_password(form.password.data):
+            if user is None:
+                # Run bcrypt anyway so response timing doesn't reveal which usernames exist
+                check_secret(form.password.data, DUMMY_PASSWORD_HASH)
+                flash('Invalid username or password.', 'error')
+            elif user.check_password(form.password.data):
                 if user.is_active:
+                    # Upgrade hashes created with an outdated cost factor
+                    if user.password_needs_rehash():
+                        user.set_password(form.password.data)
+                        db.session.commit()
                     login_user(user, remember=True)
                     next_page = request.args.get('next')
                     if not next_page or not next_page.startswith('/'):
@@ -672,7 +905,8 @@ def login():
             else:
                 flash('Invalid username or password.', 'error')
         except Exception as e:
-            flash(f'Login error: {str(e)}', 'error')
+            application.logger.error("Login error: %s", e)
+            flash('Login error', 'error')
     
     return render_template('login.html', form=form)
 
@@ -696,18 +930,22 @@ def register():
     form = UserForm()
     if form.validate_on_submit():
         try:
-            # Check if username or email already exists
-            if User.query.filter_by(username=form.username.data).first():
+            # Check if username or email already exists, in one query
+            taken = db.session.execute(
+                db.select(User.username, User.email)
+                .where(db.or_(User.username == form.username.data, User.email == form.email.data))
+            ).all()
+            if any(row.username == form.username.data for row in taken):
                 flash('Username already exists.', 'error')
                 return render_template('register.html', form=form)
             
-            if User.query.filter_by(email=form.email.data).first():
+            if taken:
                 flash('Email already registered.', 'error')
                 return render_template('register.html', form=form)
             
             # Create new user
             user = User(
-                id=f"user-{str(uuid.uuid4())[:8]}",
+                id=f"user-{random_hex_bytes(4)}",
                 username=form.username.data,
                 email=form.email.data,
                 full_name=form.full_name.data,
@@ -721,8 +959,10 @@ def register():
             flash(f'User {user.username} created successfully!', 'success')
             return redirect(url_for('home'))
             
-        except Exception as e:
-            flash(f'Error creating user: {str(e)}', 'error')
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            application.logger.error("Error creating user: %s", e)
+            flash('Error creating user', 'error')
     
     return render_template('register.html', form=form)
 
@@ -735,7 +975,7 @@ def add():
     if form.validate_on_submit():
         try:
             dog_data = {
-                'id': f"dog-{str(uuid.uuid4())[:8]}",
+                'id': f"dog-{random_hex_bytes(4)}",
                 'name': form.name.data,
                 'approx_age': form.approx_age.data,
                 'size': form.size.data,
@@ -745,66 +985,78 @@ def add():
             dog = Dog(**dog_data)
             db.session.add(dog)
             db.session.commit()
+            invalidate_dog_cache()
             
             flash('Dog added successfully!', 'success')
             return redirect(url_for('home'))
-        except Exception as e:
-            flash(f'Error adding dog: {str(e)}', 'error')
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            application.logger.error("Error adding dog: %s", e)
+            flash('Error adding dog', 'error')
     
-    return render_template('add-edit.html', dog=None, title='Add Dog', dog_sizes=dog_sizes)
+    return render_template('add-edit.html', form=form, dog=None, title='Add Dog', dog_sizes=dog_sizes)
 
 @application.route("/view/<dog_id>")
 @login_required
 def view(dog_id):
     "View dog details and events"
-    try:
-        dog = Dog.query.get(dog_id)
-        if dog:
-            # Get recent events for this dog, ordered by timestamp descending
-            events = Event.query.filter_by(dog_id=dog_id).order_by(Event.timestamp.desc()).limit(50).all()
-            events_data = [event.to_dict() for event in events]
-            return render_template('view-edit.html', dog=dog.to_dict(), events=events_data, event_types=event_types, dog_sizes=dog_sizes)
-        else:
-            flash('Dog not found', 'error')
-            return redirect(url_for('home'))
-    except Exception as e:
-        flash(f'Error viewing dog: {str(e)}', 'error')
-        return redirect(url_for('home'))
+    # The dog and its 50 most recent events in one round trip: outer-join so a dog
+    # with no events still comes back (with Event None), and LIMIT runs in SQL
+    # Full notes (up to 1000 chars each) are left to the edit page and the API
+    rows = db.session.execute(
+        db.select(Dog, Event)
+        .outerjoin(Dog.events)
+        .where(Dog.id == dog_id)
+        .order_by(Event.timestamp.desc())
+        .limit(50)
+        .options(
+            load_only(Event.id, Event.dog_id, Event.event_type, Event.timestamp,
+                      Event.end_timestamp, Event.location, Event.bristol_stool_scale),
+            undefer(Event.notes_preview),
+            undefer(Event.notes_truncated)
+        )
+    ).all()
+    if not rows:
+        abort(404, description='Dog not found')
+    
+    dog = rows[0].Dog
+    events_data = [row.Event.to_dict(summary=True) for row in rows if row.Event is not None]
+    return render_template('view-edit.html', dog=dog.to_dict(), events=events_data, event_types=event_types, dog_sizes=dog_sizes)
 
 @application.route("/edit/<dog_id>", methods=["GET", "POST"])
 @login_required
 @limiter.limit(application.config['ADD_EDIT_RATE_LIMIT'])
 def edit(dog_id):
     "Edit existing dog"
-    try:
-        dog = Dog.query.get(dog_id)
-        if not dog:
-            flash('Dog not found', 'error')
-            return redirect(url_for('home'))
-        
-        form = DogForm()
-        if form.validate_on_submit():
+    dog = db.session.get(Dog, dog_id)
+    if not dog:
+        abort(404, description='Dog not found')
+    
+    form = DogForm()
+    if form.validate_on_submit():
+        try:
             dog.name = form.name.data
             dog.approx_age = form.approx_age.data
             dog.size = form.size.data
             dog.breed_type = form.breed_type.data
             
             db.session.commit()
+            invalidate_dog_cache()
             flash('Dog updated successfully!', 'success')
             return redirect(url_for('view', dog_id=dog_id))
-        
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            application.logger.error("Error editing dog: %s", e)
+            flash('Error editing dog', 'error')
+    else:
         # Pre-populate form
         form.dog_id.data = dog.id
         form.name.data = dog.name
         form.approx_age.data = dog.approx_age
         form.size.data = dog.size
         form.breed_type.data = dog.breed_type
-        
-        return render_template('add-edit.html', dog=dog.to_dict(), title='Edit Dog', dog_sizes=dog_sizes)
-        
-    except Exception as e:
-        flash(f'Error editing dog: {str(e)}', 'error')
-        return redirect(url_for('home'))
+    
+    return render_template('add-edit.html', form=form, dog=dog.to_dict(), title='Edit Dog', dog_sizes=dog_sizes)
 
 @application.route("/delete/<dog_id>", methods=["POST"])
 @login_required
@@ -817,15 +1069,18 @@ def delete(dog_id):
         return redirect(url_for('home'))
     
     try:
-        dog = Dog.query.get(dog_id)
+        dog = db.session.get(Dog, dog_id)
         if dog:
             db.session.delete(dog)
             db.session.commit()
+            invalidate_dog_cache()
             flash('Dog deleted successfully!', 'success')
         else:
             flash('Dog not found', 'error')
-    except Exception as e:
-        flash(f'Error deleting dog: {str(e)}', 'error')
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        application.logger.error("Error deleting dog: %s", e)
+        flash('Error deleting dog', 'error')
     
     return redirect(url_for('home'))
 
@@ -836,13 +1091,12 @@ def delete(dog_id):
 def add_event():
     "Add new event"
     form = EventForm()
-    # Populate dog choices
-    form.dog_id.choices = [(dog.id, dog.name) for dog in Dog.query.all()]
+    form.dog_id.choices = dogs = get_dog_choices()
     
     if form.validate_on_submit():
         try:
             event_data = {
-                'id': f"evt-{str(uuid.uuid4())[:8]}",
+                'id': f"evt-{random_hex_bytes(4)}",
                 'dog_id': form.dog_id.data,
                 'event_type': form.event_type.data,
                 'timestamp': form.timestamp.data,
@@ -858,10 +1112,12 @@ def add_event():
             
             flash('Event added successfully!', 'success')
             return redirect(url_for('view', dog_id=form.dog_id.data))
-        except Exception as e:
-            flash(f'Error adding event: {str(e)}', 'error')
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            application.logger.error("Error adding event: %s", e)
+            flash('Error adding event', 'error')
     
-    return render_template('add-edit-event.html', event=None, title='Add Event', event_types=event_types, dogs=Dog.query.all())
+    return render_template('add-edit-event.html', form=form, event=None, title='Add Event', event_types=event_types, dogs=dogs)
 
 @application.route("/edit-event/<event_id>", methods=["GET", "POST"])
 @login_required
@@ -869,14 +1125,13 @@ def add_event():
 def edit_event(event_id):
     "Edit existing event"
     try:
-        event = Event.query.get(event_id)
+        event = db.session.get(Event, event_id)
         if not event:
             flash('Event not found', 'error')
             return redirect(url_for('home'))
         
         form = EventForm()
-        # Populate dog choices
-        form.dog_id.choices = [(dog.id, dog.name) for dog in Dog.query.all()]
+        form.dog_id.choices = dogs = get_dog_choices()
         
         if form.validate_on_submit():
             event.dog_id = form.dog_id.data
@@ -901,10 +1156,12 @@ def edit_event(event_id):
         form.notes.data = event.notes
         form.bristol_stool_scale.data = str(event.bristol_stool_scale) if event.bristol_stool_scale else ''
         
-        return render_template('add-edit-event.html', event=event.to_dict(), title='Edit Event', event_types=event_types, dogs=Dog.query.all())
+        return render_template('add-edit-event.html', form=form, event=event.to_dict(), title='Edit Event', event_types=event_types, dogs=dogs)
         
-    except Exception as e:
-        flash(f'Error editing event: {str(e)}', 'error')
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        application.logger.error("Error editing event: %s", e)
+        flash('Error editing event', 'error')
         return redirect(url_for('home'))
 
 @application.route("/delete-event/<event_id>", methods=["POST"])
@@ -918,7 +1175,7 @@ def delete_event(event_id):
         return redirect(url_for('home'))
     
     try:
-        event = Event.query.get(event_id)
+        event = db.session.get(Event, event_id)
         if event:
             dog_id = event.dog_id
             db.session.delete(event)
@@ -927,22 +1184,38 @@ def delete_event(event_id):
             return redirect(url_for('view', dog_id=dog_id))
         else:
             flash('Event not found', 'error')
-    except Exception as e:
-        flash(f'Error deleting event: {str(e)}', 'error')
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        application.logger.error("Error deleting event: %s", e)
+        flash('Error deleting event', 'error')
     
     return redirect(url_for('home'))
 
 # Health check endpoint for production monitoring
-@application.route("/health")
-def health_check():
-    """Health check endpoint for production monitoring"""
+# (monotonic time checked, status) of the last database probe, replaced as a whole
+db_health = (float('-inf'), 'unknown')
+
+def database_status():
+    """Return the database status, probing at most once per HEALTH_DB_CHECK_INTERVAL"""
+    global db_health
+    checked_at, db_status = db_health
+    now = time.monotonic()
+    if now - checked_at < application.config['HEALTH_DB_CHECK_INTERVAL']:
+        return db_status
     try:
         # Check database connectivity
         db.session.execute(db.text('SELECT 1'))
         db_status = 'healthy'
     except Exception as e:
-        application.logger.error(f"Database health check failed: {e}")
+        application.logger.error("Database health check failed: %s", e)
         db_status = 'unhealthy'
+    db_health = (now, db_status)
+    return db_status
+
+@application.route("/health")
+def health_check():
+    """Health check endpoint for production monitoring"""
+    db_status = database_status()
     
     # Check application status
     app_status = 'healthy' if application else 'unhealthy'
@@ -960,46 +1233,62 @@ def health_check():
     status_code = 200 if health_data['status'] == 'healthy' else 503
     return health_data, status_code
 
+# Success envelopes for API responses, kept as text so serialized payloads are
+# spliced in directly instead of being wrapped in a dict and re-serialized
+API_ENVELOPE_HEAD = '{"data":'
+API_ITEM_TAIL = ',"success":true}\n'
+API_LIST_TAIL = ',"success":true,"total":%d}\n'
+
+def api_item_response(data):
+    """JSON response for a single API object"""
+    return application.response_class(API_ENVELOPE_HEAD + application.json.dumps(data) + API_ITEM_TAIL,
+                                      mimetype='application/json')
+
+def is_admin_request():
+    """Admins polling the read-only API skip the per-client rate limit check"""
+    return current_user.is_authenticated and current_user.role == 'admin'
+
 # API endpoints
 @application.route('/api/dogs')
 @login_required
-@limiter.limit(application.config['API_RATE_LIMIT'])
+@limiter.limit(application.config['API_RATE_LIMIT'], exempt_when=is_admin_request)
 def api_dogs():
     """API endpoint to get all dogs"""
-    try:
-        dogs = [dog.to_dict() for dog in Dog.query.all()]
-        return {'success': True, 'data': dogs, 'total': len(dogs)}
-    except Exception as e:
-        application.logger.error(f"API error in api_dogs: {e}")
-        return {'success': False, 'error': str(e)}, 500
+    # Cache the serialized body; the ETag lets repeat clients get a 304 with no body
+    body = cache.get(API_DOGS_CACHE_KEY)
+    if body is None:
+        dogs = list_dog_dicts()
+        body = API_ENVELOPE_HEAD + application.json.dumps(dogs) + API_LIST_TAIL % len(dogs)
+        cache.set(API_DOGS_CACHE_KEY, body, timeout=application.config['DOG_CACHE_TIMEOUT'])
+    response = application.response_class(body, mimetype='application/json')
+    response.add_etag()
+    return response.make_conditional(request)
 
 @application.route('/api/dogs/<dog_id>')
 @login_required
-@limiter.limit(application.config['API_RATE_LIMIT'])
+@limiter.limit(application.config['API_RATE_LIMIT'], exempt_when=is_admin_request)
 def api_dog(dog_id):
     """API endpoint to get specific dog"""
-    try:
-        dog = Dog.query.get(dog_id)
-        if dog:
-            return {'success': True, 'data': dog.to_dict()}
-        else:
-            return {'success': False, 'error': 'Dog not found'}, 404
-    except Exception as e:
-        application.logger.error(f"API error in api_dog: {e}")
-        return {'success': False, 'error': str(e)}, 500
+    dog = db.session.get(Dog, dog_id)
+    if not dog:
+        abort(404, description='Dog not found')
+    return api_item_response(dog.to_dict())
 
 @application.route('/api/dogs/<dog_id>/events')
 @login_required
-@limiter.limit(application.config['API_RATE_LIMIT'])
+@limiter.limit(application.config['API_RATE_LIMIT'], exempt_when=is_admin_request)
 def api_dog_events(dog_id):
     """API endpoint to get events for a specific dog"""
-    try:
-        events = Event.query.filter_by(dog_id=dog_id).order_by(Event.timestamp.desc()).all()
-        events_data = [event.to_dict() for event in events]
-        return {'success': True, 'data': events_data, 'total': len(events_data)}
-    except Exception as e:
-        application.logger.error(f"API error in api_dog_events: {e}")
-        return {'success': False, 'error': str(e)}, 500
+    # to_dict() reads only columns, so no relationship needs eager loading here
+    events = [event.to_dict() for event in db.session.scalars(
+        db.select(Event)
+        .filter_by(dog_id=dog_id)
+        .order_by(Event.timestamp.desc())
+    )]
+    # Serialized in one piece before any byte is sent, so an error mid-query still
+    # reaches the 500 handler instead of truncating a 200 response
+    body = API_ENVELOPE_HEAD + application.json.dumps(events) + API_LIST_TAIL % len(events)
+    return application.response_class(body, mimetype='application/json')
 
 if __name__ == "__main__":
     # Production settings - no debug mode
@@ -16,6 +16,16 @@ class Config:
     DATABASE_URL = os.getenv('DATABASE_URL', 'postgresql://localhost/dog_events_db')
     SQLALCHEMY_DATABASE_URI = DATABASE_URL
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Keep enough pooled connections that requests waiting on bcrypt don't starve the rest
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),  # seconds
+        'query_cache_size': int(os.getenv('DB_QUERY_CACHE_SIZE', 1200))  # compiled statements kept per engine
+    }
+    # Skip the create-tables/sample-data pass at import once `flask init-db` has been run
+    SKIP_DB_INIT = os.getenv('SKIP_DB_INIT', 'False').lower() == 'true'
     
     # Security Configuration
     WTF_CSRF_ENABLED = os.getenv('WTF_CSRF_ENABLED', 'True').lower() == 'true'
@@ -26,6 +36,7 @@ class Config:
     SESSION_COOKIE_HTTPONLY = os.getenv('SESSION_COOKIE_HTTPONLY', 'True').lower() == 'true'
     SESSION_COOKIE_SAMESITE = os.getenv('SESSION_COOKIE_SAMESITE', 'Lax')
     PERMANENT_SESSION_LIFETIME = timedelta(seconds=int(os.getenv('PERMANENT_SESSION_LIFETIME', 3600)))
+    PREFERRED_URL_SCHEME = os.getenv('PREFERRED_URL_SCHEME', 'http')  # 'https' enables SameSite=None cookies
     
     # Rate Limiting Configuration
     DEFAULT_RATE_LIMITS = os.getenv('DEFAULT_RATE_LIMITS', '200 per day, 50 per hour')
@@ -34,6 +45,25 @@ class Config:
     ADD_EDIT_RATE_LIMIT = os.getenv('ADD_EDIT_RATE_LIMIT', '10 per minute')
     DELETE_RATE_LIMIT = os.getenv('DELETE_RATE_LIMIT', '5 per minute')
     API_RATE_LIMIT = os.getenv('API_RATE_LIMIT', '100 per hour')
+    # memory:// is per-process; use redis://host:6379 when running several workers
+    RATELIMIT_STORAGE_URI = os.getenv('RATELIMIT_STORAGE_URI', 'memory://')
+    
+    # Cache Configuration - SimpleCache is per-process; use RedisCache to share across workers
+    CACHE_TYPE = os.getenv('CACHE_TYPE', 'SimpleCache')
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_DEFAULT_TIMEOUT = int(os.getenv('CACHE_DEFAULT_TIMEOUT', 300))
+    DOG_CACHE_TIMEOUT = int(os.getenv('DOG_CACHE_TIMEOUT', 60))  # bounds staleness of cached dog lists in other workers
+    
+    # Password Hashing Configuration
+    # Passwords are low-entropy and get the full cost; random tokens and API keys
+    # don't need it, so they use a much cheaper cost. Set the password cost once per
+    # deployment (`flask calibrate-bcrypt` suggests one) so every worker agrees on it
+    PASSWORD_BCRYPT_ROUNDS = int(os.getenv('PASSWORD_BCRYPT_ROUNDS', 12))
+    BCRYPT_TARGET_MS = int(os.getenv('BCRYPT_TARGET_MS', 200))  # hashing time calibrate-bcrypt aims for
+    TOKEN_BCRYPT_ROUNDS = int(os.getenv('TOKEN_BCRYPT_ROUNDS', 6))
+    
+    # Health Check Configuration
+    HEALTH_DB_CHECK_INTERVAL = float(os.getenv('HEALTH_DB_CHECK_INTERVAL', 5))  # seconds between database probes
     
     # Logging Configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -47,6 +77,7 @@ class DevelopmentConfig(Config):
     # Use PostgreSQL for development to avoid SQLite issues
     DATABASE_URL = os.getenv('DATABASE_URL', 'postgresql://localhost/dog_events_dev')
     LOG_LEVEL = 'DEBUG'
+    PASSWORD_BCRYPT_ROUNDS = int(os.getenv('PASSWORD_BCRYPT_ROUNDS', 10))  # fixed and cheaper than production
     
     # Development-specific settings
     SESSION_COOKIE_SECURE = False  # Allow HTTP in development
@@ -70,6 +101,10 @@ class TestingConfig(Config):
     # Use in-memory SQLite only for testing
     DATABASE_URL = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # in-memory SQLite uses a single-connection pool
+    CACHE_TYPE = 'NullCache'  # every lookup hits the database
+    PASSWORD_BCRYPT_ROUNDS = 4  # bcrypt minimum, keeps sample users and logins fast in tests
+    TOKEN_BCRYPT_ROUNDS = 4
     
     # Testing-specific settings
     SESSION_COOKIE_SECURE = False
@@ -2,11 +2,13 @@
 Database abstraction layer supporting both SQLite (local) and PostgreSQL (production)
 """
 import os
-from datetime import datetime, timezone
+import secrets
+from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, event as sa_event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from util import set_sqlite_pragmas
 
 # Database configuration
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///dogs.db')
@@ -26,8 +28,8 @@ class Dog(db.Model):
     size = db.Column(db.String(20), nullable=False)  # Small, Medium, Large
     breed_type = db.Column(db.String(100), nullable=False)
     
-    # Relationship to events
-    events = db.relationship('Event', backref='dog', lazy=True, cascade='all, delete-orphan')
+    # Relationship to events - lazy loads raise, so callers must eager-load (N+1 guard)
+    events = db.relationship('Event', back_populates='dog', cascade='all, delete-orphan', lazy='raise_on_sql')
     
     def to_dict(self):
         """Convert dog to dictionary format"""
@@ -53,16 +55,23 @@ class Dog(db.Model):
 class Event(db.Model):
     """Event model for both local and production databases"""
     __tablename__ = 'events'
+    __table_args__ = (
+        # Serves get_dog_events (WHERE dog_id ORDER BY timestamp) as an ordered index range scan
+        db.Index('ix_events_dog_ts', 'dog_id', 'timestamp'),
+    )
     
     id = db.Column(db.String(36), primary_key=True)
     dog_id = db.Column(db.String(36), db.ForeignKey('dogs.id'), nullable=False)
     event_type = db.Column(db.String(50), nullable=False)  # walk, poop, pee, vomit, nap
-    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.now(timezone.utc))
+    timestamp = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
     end_timestamp = db.Column(db.DateTime, nullable=True)
     location = db.Column(db.String(200), nullable=True)  # Optional location
     notes = db.Column(db.Text, nullable=True)  # Optional notes
     bristol_stool_scale = db.Column(db.Integer, nullable=True)  # 1-7 for poop events
     
+    # Relationship to dog
+    dog = db.relationship('Dog', back_populates='events', lazy='raise_on_sql')
+    
     def to_dict(self):
         """Convert event to dictionary format"""
         duration = None
@@ -100,8 +109,15 @@ def init_database(app):
     db.init_app(app)
     
     with app.app_context():
+        # Only SQLite engines get the pragmas; PostgreSQL connections are left alone
+        if db.engine.dialect.name == 'sqlite':
+            sa_event.listen(db.engine, 'connect', set_sqlite_pragmas)
+        
         # Create tables
         db.create_all()
+        # Databases created before ix_events_dog_ts existed still need it
+        for index in Event.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
         
         # Add sample data if table is empty
         if Dog.query.count() == 0:
@@ -122,10 +138,8 @@ def init_database(app):
                 }
             ]
             
-            for dog_data in sample_dogs:
-                dog = Dog.from_dict(dog_data)
-                db.session.add(dog)
-            
+            # One executemany INSERT rather than building and flushing an ORM object per row
+            db.session.execute(db.insert(Dog), sample_dogs)
             db.session.commit()
         
         if Event.query.count() == 0:
@@ -162,88 +176,96 @@ def init_database(app):
                 }
             ]
             
-            for event_data in sample_events:
-                event = Event.from_dict(event_data)
-                db.session.add(event)
-            
+            db.session.execute(db.insert(Event), sample_events)
             db.session.commit()
 
 def get_dogs():
     """Get all dogs"""
-    return [dog.to_dict() for dog in Dog.query.all()]
+    # Plain rows shaped like Dog.to_dict(), without building ORM objects
+    columns = (Dog.id, Dog.name, Dog.approx_age, Dog.size, Dog.breed_type)
+    return [row._asdict() for row in db.session.execute(db.select(*columns))]
 
 def get_dog(dog_id):
     """Get dog by ID"""
-    dog = Dog.query.get(dog_id)
+    dog = db.session.get(Dog, dog_id)
     return dog.to_dict() if dog else None
 
-def create_dog(dog_data):
+# Mutation helpers commit by default; pass commit=False to group several writes into
+# one transaction (one fsync on SQLite) and commit once, e.g. inside `with db.session.begin():`
+# Updates and deletes are single UPDATE ... RETURNING / DELETE statements rather than
+# load-modify-flush, and results are serialized before commit() expires the instance
+def create_dog(dog_data, commit=True):
     """Create new dog"""
-    import uuid
     if not dog_data.get('id'):
-        dog_data['id'] = f"dog-{str(uuid.uuid4())[:8]}"
+        dog_data['id'] = f"dog-{secrets.token_hex(4)}"
     
     dog = Dog.from_dict(dog_data)
     db.session.add(dog)
-    db.session.commit()
-    return dog.to_dict()
+    result = dog.to_dict()
+    if commit:
+        db.session.commit()
+    return result
 
-def update_dog(dog_id, dog_data):
+def update_dog(dog_id, dog_data, commit=True):
     """Update existing dog"""
-    dog = Dog.query.get(dog_id)
-    if not dog:
-        return None
-    
-    for key, value in dog_data.items():
-        if key != 'id' and hasattr(dog, key):
-            setattr(dog, key, value)
+    values = {key: value for key, value in dog_data.items() if key != 'id' and key in Dog.__table__.c}
+    if not values:
+        return get_dog(dog_id)
     
-    db.session.commit()
-    return dog.to_dict()
+    dog = db.session.execute(
+        db.update(Dog).where(Dog.id == dog_id).values(**values).returning(Dog)
+    ).scalar()
+    result = dog.to_dict() if dog else None
+    if commit:
+        db.session.commit()
+    return result
 
-def delete_dog(dog_id):
+def delete_dog(dog_id, commit=True):
     """Delete dog"""
-    dog = Dog.query.get(dog_id)
-    if dog:
-        db.session.delete(dog)
+    # Bulk deletes skip the ORM cascade, so remove the dog's events explicitly
+    db.session.execute(db.delete(Event).where(Event.dog_id == dog_id))
+    deleted = db.session.execute(db.delete(Dog).where(Dog.id == dog_id)).rowcount
+    if commit:
         db.session.commit()
-        return True
-    return False
+    return deleted > 0
 
 def get_dog_events(dog_id):
     """Get events for a specific dog"""
     events = Event.query.filter_by(dog_id=dog_id).order_by(Event.timestamp.desc()).all()
     return [event.to_dict() for event in events]
 
-def create_event(event_data):
+def create_event(event_data, commit=True):
     """Create new event"""
-    import uuid
     if not event_data.get('id'):
-        event_data['id'] = f"evt-{str(uuid.uuid4())[:8]}"
+        event_data['id'] = f"evt-{secrets.token_hex(4)}"
     
     event = Event.from_dict(event_data)
     db.session.add(event)
-    db.session.commit()
+    # Flush even without a commit so a database-default timestamp is there to serialize
+    if commit:
+        db.session.commit()
+    else:
+        db.session.flush()
     return event.to_dict()
 
-def update_event(event_id, event_data):
+def update_event(event_id, event_data, commit=True):
     """Update existing event"""
-    event = Event.query.get(event_id)
-    if not event:
-        return None
-    
-    for key, value in event_data.items():
-        if key != 'id' and hasattr(event, key):
-            setattr(event, key, value)
+    values = {key: value for key, value in event_data.items() if key != 'id' and key in Event.__table__.c}
+    if not values:
+        event = db.session.get(Event, event_id)
+        return event.to_dict() if event else None
     
-    db.session.commit()
-    return event.to_dict()
+    event = db.session.execute(
+        db.update(Event).where(Event.id == event_id).values(**values).returning(Event)
+    ).scalar()
+    result = event.to_dict() if event else None
+    if commit:
+        db.session.commit()
+    return result
 
-def delete_event(event_id):
+def delete_event(event_id, commit=True):
     """Delete event"""
-    event = Event.query.get(event_id)
-    if event:
-        db.session.delete(event)
+    deleted = db.session.execute(db.delete(Event).where(Event.id == event_id)).rowcount
+    if commit:
         db.session.commit()
-        return True
-    return False
+    return deleted > 0
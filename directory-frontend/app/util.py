@@ -1,6 +1,33 @@
 """Shared utility helper functions"""
 import os
+import orjson
+from flask.json.provider import DefaultJSONProvider
 
 def random_hex_bytes(n_bytes):
     """Create a hex encoded string of random bytes"""
     return os.urandom(n_bytes).hex()
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune each new SQLite connection (a SQLAlchemy "connect" listener) for concurrent reads and cheaper commits"""
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers run alongside the writer; NORMAL syncs at checkpoints, not every commit
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=134217728")  # 128MB
+    cursor.close()
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes with orjson instead of the stdlib json module"""
+    
+    def dumps(self, obj, **kwargs):
+        # Datetimes pass through to Flask's default hook so they keep its RFC 822 format
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
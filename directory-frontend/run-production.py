@@ -19,7 +19,7 @@ def main():
     """Main production startup function"""
     try:
         # Import application after environment is set
-        from app.application import application, db
+        from app.application import application
         
         print("🚀 Starting Dog Events Tracker Production Server")
         print("=" * 50)
@@ -29,9 +29,10 @@ def main():
         print(f"Log Level: {application.config.get('LOG_LEVEL', 'INFO')}")
         print("=" * 50)
         
-        # Initialize database
-        with application.app_context():
-            db.create_all()
+        # Importing the app already ran init_db() unless SKIP_DB_INIT is set, so don't repeat create_all() here
+        if application.config['SKIP_DB_INIT']:
+            print("⏭️  Skipping database initialization (SKIP_DB_INIT); run `flask init-db` to provision the schema")
+        else:
             print("✅ Database initialized successfully")
         
         # Start production server
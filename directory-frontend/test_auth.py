@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for password storage and login against the Flask application
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+import bcrypt
+
+# Add the app directory to Python path
+app_dir = Path(__file__).parent / 'app'
+sys.path.insert(0, str(app_dir))
+
+# The application configures itself at import, so point it at a throwaway
+# SQLite database holding a row from before password hashes were stored as bytes
+DB_DIR = tempfile.mkdtemp()
+LEGACY_PASSWORD = 'Legacy123!'
+os.environ['FLASK_ENV'] = 'testing'
+os.environ['DATABASE_URL'] = f"sqlite:///{DB_DIR}/auth.db"
+
+legacy_conn = sqlite3.connect(f"{DB_DIR}/auth.db")
+legacy_conn.execute("""
+    CREATE TABLE users (
+        id VARCHAR(36) PRIMARY KEY,
+        username VARCHAR(80) UNIQUE NOT NULL,
+        email VARCHAR(120) UNIQUE NOT NULL,
+        password_hash VARCHAR(128) NOT NULL,
+        full_name VARCHAR(100) NOT NULL,
+        role VARCHAR(20),
+        is_active BOOLEAN,
+        created_at DATETIME
+    )
+""")
+legacy_conn.execute(
+    "INSERT INTO users (id, username, email, password_hash, full_name, role, is_active) "
+    "VALUES ('user-legacy', 'legacy', 'legacy@example.com', ?, 'Legacy User', 'employee', 1)",
+    (bcrypt.hashpw(LEGACY_PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds=4)).decode('utf-8'),)
+)
+legacy_conn.commit()
+legacy_conn.close()
+
+from application import application, db, limiter, User
+
+application.config['WTF_CSRF_ENABLED'] = False
+limiter.enabled = False
+
+def test_login_with_legacy_text_hash():
+    """A hash stored as text by an older release is converted at startup and still logs in"""
+    with application.app_context():
+        assert isinstance(db.session.get(User, 'user-legacy').password_hash, bytes)
+
+    client = application.test_client()
+    response = client.post('/login', data={'username': 'legacy', 'password': LEGACY_PASSWORD})
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/')
+    print("✅ Legacy text hash converted and login succeeded")
+
+def test_password_needs_rehash_only_upgrades():
+    """Hashes below the configured cost are upgraded; hashes above it are never downgraded"""
+    configured = application.config['PASSWORD_BCRYPT_ROUNDS']
+    user = User(password_hash=bcrypt.hashpw(b'x', bcrypt.gensalt(rounds=5)))
+    with application.app_context():
+        try:
+            application.config['PASSWORD_BCRYPT_ROUNDS'] = 5
+            assert not user.password_needs_rehash()
+            application.config['PASSWORD_BCRYPT_ROUNDS'] = 6
+            assert user.password_needs_rehash()
+            application.config['PASSWORD_BCRYPT_ROUNDS'] = 4
+            assert not user.password_needs_rehash()
+        finally:
+            application.config['PASSWORD_BCRYPT_ROUNDS'] = configured
+    print("✅ Rehash only raises the bcrypt cost")
+
+if __name__ == "__main__":
+    test_login_with_legacy_text_hash()
+    test_password_needs_rehash_only_upgrades()
+    print("\n🎉 Auth tests completed successfully!")
@@ -2,11 +2,17 @@
 Flask application factory for Employee Directory
 Optimized for AWS Lambda deployment
 """
-from flask import Flask
+from flask import Flask, current_app
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event as sa_event
+from sqlalchemy.pool import NullPool
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from flask_caching import Cache
 import os
+import logging
+import orjson
 
 # Initialize SQLAlchemy
 db = SQLAlchemy()
@@ -15,18 +21,61 @@ db = SQLAlchemy()
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"
+    # memory:// counts per container; point at Redis to share limits across instances
+    storage_uri=os.getenv('RATELIMIT_STORAGE_URI', 'memory://')
 )
 
+# Initialize cache for the employee list
+cache = Cache()
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Serialize API responses with orjson - employee rows are only strings and lists"""
+    
+    def dumps(self, obj, **kwargs):
+        # Keep Flask's sorted keys so the JSON matches what the stdlib provider produced
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if self.sort_keys else 0).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 def create_app():
     """Application factory pattern"""
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    app.logger.setLevel(getattr(logging, os.getenv('LOG_LEVEL', 'INFO')))
     
     # Configuration
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///employees.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if os.getenv('AWS_LAMBDA_FUNCTION_NAME') and os.getenv('DB_NULL_POOL', 'True').lower() == 'true':
+        # Frozen Lambda containers would otherwise keep idle connections open against
+        # Aurora's connection limit; connect per request instead (or front Aurora with RDS Proxy)
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'poolclass': NullPool}
+    else:
+        # A Lambda container serves one request at a time, so keep the pool small
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_size': int(os.getenv('DB_POOL_SIZE', 1)),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 2)),
+            'pool_pre_ping': True,
+            'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 300))  # seconds
+        }
+    # The statement cache belongs to the engine, not the pool, so it outlives NullPool connections
+    app.config['SQLALCHEMY_ENGINE_OPTIONS']['query_cache_size'] = int(os.getenv('DB_QUERY_CACHE_SIZE', 1200))
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        # Wait briefly for a competing writer instead of failing with "database is locked"
+        app.config['SQLALCHEMY_ENGINE_OPTIONS']['connect_args'] = {'timeout': 5}
+    # JSONB badge values on PostgreSQL go through orjson rather than the stdlib json module
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'].update(
+        json_serializer=lambda obj: orjson.dumps(obj).decode(),
+        json_deserializer=orjson.loads
+    )
     app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET', os.urandom(24).hex())
     
+    # SimpleCache is per container; other containers see changes once EMPLOYEE_CACHE_TIMEOUT passes
+    app.config['CACHE_TYPE'] = os.getenv('CACHE_TYPE', 'SimpleCache')
+    app.config['CACHE_REDIS_URL'] = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    app.config['EMPLOYEE_CACHE_TIMEOUT'] = int(os.getenv('EMPLOYEE_CACHE_TIMEOUT', 30))
+    
     # Enable CSRF protection
     app.config['WTF_CSRF_ENABLED'] = True
     app.config['WTF_CSRF_TIME_LIMIT'] = 3600  # 1 hour
@@ -40,28 +89,66 @@ def create_app():
     # Initialize extensions
     db.init_app(app)
     limiter.init_app(app)
+    cache.init_app(app)
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            sa_event.listen(db.engine, 'connect', set_sqlite_pragmas)
     
     # Register blueprints
     from .routes import main_bp
     app.register_blueprint(main_bp)
     
-    # Create tables and initialize data
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create tables and load sample data"""
+        init_db(app)
+    
+    # Cold starts skip the DDL and probe query once `flask init-db` has been run
+    if os.getenv('SKIP_DB_INIT', 'False').lower() != 'true':
+        init_db(app)
+    
+    return app
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Let SQLite readers run alongside the single writer (local/dev databases)"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+def init_db(app):
+    """Create tables and initialize data"""
     with app.app_context():
         try:
             db.create_all()
-            # Initialize sample data if table is empty
+            if db.engine.dialect.name == 'postgresql':
+                upgrade_badges_column()
+            # Initialize sample data if table is empty (EXISTS stops at the first row)
             from .models import Employee
-            if Employee.query.count() == 0:
+            if not db.session.scalar(db.select(db.exists().select_from(Employee))):
                 init_sample_data()
         except Exception as e:
-            print(f"Database initialization error: {e}")
-    
-    return app
+            app.logger.error("Database initialization error: %s", e)
+
+def upgrade_badges_column():
+    """Convert a TEXT badges column from older deployments to JSONB and GIN-index it"""
+    column_type = db.session.scalar(db.text(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = 'employees' AND column_name = 'badges'"
+    ))
+    if column_type == 'text':
+        db.session.execute(db.text(
+            "ALTER TABLE employees ALTER COLUMN badges TYPE JSONB "
+            "USING COALESCE(NULLIF(badges, ''), '[]')::jsonb"
+        ))
+    db.session.execute(db.text(
+        "CREATE INDEX IF NOT EXISTS ix_employees_badges ON employees USING gin (badges)"
+    ))
+    db.session.commit()
 
 def init_sample_data():
     """Initialize sample employee data"""
-    from .models import Employee
-    import uuid
+    from .models import create_employees
     
     sample_employees = [
         {
@@ -80,13 +167,5 @@ def init_sample_data():
         }
     ]
     
-    for emp_data in sample_employees:
-        employee = Employee.from_dict(emp_data)
-        db.session.add(employee)
-    
-    try:
-        db.session.commit()
-        print("Sample data initialized successfully")
-    except Exception as e:
-        print(f"Error initializing sample data: {e}")
-        db.session.rollback()
+    if create_employees(sample_employees) is not None:
+        current_app.logger.info("Sample data initialized successfully")
@@ -2,9 +2,32 @@
 Database models for Employee Directory
 Optimized for Aurora Serverless
 """
-from . import db
-import json
-import uuid
+from flask import current_app
+from sqlalchemy.dialects.postgresql import JSONB
+from . import db, cache
+import orjson
+import secrets
+
+class JSONList(db.TypeDecorator):
+    """List stored as JSONB on PostgreSQL and as JSON text elsewhere - decoded once when the row loads"""
+    impl = db.Text
+    cache_ok = True
+    
+    def load_dialect_impl(self, dialect):
+        # JSONB lets the driver hand back lists directly and supports GIN indexing/containment queries
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(db.Text())
+    
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name == 'postgresql':
+            return value
+        return orjson.dumps(value).decode()
+    
+    def process_result_value(self, value, dialect):
+        if dialect.name == 'postgresql':
+            return value or []
+        return orjson.loads(value) if value else []
 
 class Employee(db.Model):
     """Employee model for Aurora Serverless"""
@@ -14,12 +37,12 @@ class Employee(db.Model):
     fullname = db.Column(db.String(100), nullable=False)
     location = db.Column(db.String(100), nullable=False)
     job_title = db.Column(db.String(100), nullable=False)
-    badges = db.Column(db.Text)
+    badges = db.Column(JSONList)  # JSONB on PostgreSQL, TEXT on SQLite
     
     def __init__(self, **kwargs):
-        # Generate ID if not provided
-        if 'id' not in kwargs:
-            kwargs['id'] = f"emp-{str(uuid.uuid4())[:8]}"
+        # Generate ID if not provided (from_dict passes id=None for new employees)
+        if not kwargs.get('id'):
+            kwargs['id'] = f"emp-{secrets.token_hex(4)}"
         super().__init__(**kwargs)
     
     def to_dict(self):
@@ -29,7 +52,7 @@ class Employee(db.Model):
             'fullname': self.fullname,
             'location': self.location,
             'job_title': self.job_title,
-            'badges': json.loads(self.badges) if self.badges else []
+            'badges': self.badges or []
         }
     
     @classmethod
@@ -40,28 +63,86 @@ class Employee(db.Model):
             fullname=data.get('fullname'),
             location=data.get('location'),
             job_title=data.get('job_title'),
-            badges=json.dumps(data.get('badges', []))
+            badges=data.get('badges', [])
         )
     
+    @staticmethod
+    def to_mapping(data):
+        """Build a plain row dict for executemany inserts - no ORM instance or attribute events"""
+        return {
+            'id': data.get('id') or f"emp-{secrets.token_hex(4)}",
+            'fullname': data.get('fullname'),
+            'location': data.get('location'),
+            'job_title': data.get('job_title'),
+            'badges': data.get('badges', [])
+        }
+    
     def __repr__(self):
         return f'<Employee {self.fullname}>'
 
+# Cache keys for the employee list, in both of its shapes
+EMPLOYEES_CACHE_KEY = 'employees'
+EMPLOYEES_JSON_CACHE_KEY = 'employees_json'
+
+def invalidate_employee_cache():
+    """Drop cached employee lists - call after any employee is added, changed or deleted"""
+    cache.delete_many(EMPLOYEES_CACHE_KEY, EMPLOYEES_JSON_CACHE_KEY)
+
 # Database utility functions
 def get_employees():
     """Get all employees"""
+    employees = cache.get(EMPLOYEES_CACHE_KEY)
+    if employees is not None:
+        return employees
     try:
-        return [emp.to_dict() for emp in Employee.query.all()]
+        # Plain rows skip ORM instantiation; JSONList already decodes badges (None -> [])
+        columns = (Employee.id, Employee.fullname, Employee.location, Employee.job_title, Employee.badges)
+        employees = [row._asdict() for row in db.session.execute(db.select(*columns))]
     except Exception as e:
-        print(f"Error getting employees: {e}")
+        current_app.logger.error("Error getting employees: %s", e)
         return []
+    cache.set(EMPLOYEES_CACHE_KEY, employees, timeout=current_app.config['EMPLOYEE_CACHE_TIMEOUT'])
+    return employees
+
+def get_employees_json():
+    """Get all employees as a JSON array string built by the database, plus the count
+    
+    The array has the same objects as get_employees(), so the API can send it
+    without decoding badges or building a dict per row in Python.
+    """
+    cached = cache.get(EMPLOYEES_JSON_CACHE_KEY)
+    if cached is not None:
+        return cached
+    try:
+        if db.engine.dialect.name == 'postgresql':
+            badges = db.func.coalesce(Employee.badges, db.cast(db.literal('[]', db.Text), JSONB))
+            employee = db.func.json_build_object(
+                'badges', badges, 'fullname', Employee.fullname, 'id', Employee.id,
+                'job_title', Employee.job_title, 'location', Employee.location
+            )
+            payload = db.cast(db.func.json_agg(employee), db.Text)
+        else:
+            badges = db.func.coalesce(db.func.nullif(db.type_coerce(Employee.badges, db.Text), ''), '[]')
+            employee = db.func.json_object(
+                'badges', db.func.json(badges), 'fullname', Employee.fullname, 'id', Employee.id,
+                'job_title', Employee.job_title, 'location', Employee.location
+            )
+            payload = db.func.json_group_array(employee)
+        query = db.select(db.func.coalesce(payload, '[]'), db.func.count()).select_from(Employee)
+        data, total = db.session.execute(query).one()
+    except Exception as e:
+        current_app.logger.error("Error getting employees: %s", e)
+        return '[]', 0
+    cache.set(EMPLOYEES_JSON_CACHE_KEY, (data, total), timeout=current_app.config['EMPLOYEE_CACHE_TIMEOUT'])
+    return data, total
 
 def get_employee(employee_id):
     """Get employee by ID"""
     try:
-        employee = Employee.query.get(employee_id)
+        employee = db.session.get(Employee, employee_id)
         return employee.to_dict() if employee else None
     except Exception as e:
-        print(f"Error getting employee {employee_id}: {e}")
+        current_app.logger.error("Error getting employee %s: %s", employee_id, e)
         return None
 
 def create_employee(employee_data):
@@ -70,43 +151,53 @@ def create_employee(employee_data):
         employee = Employee.from_dict(employee_data)
         db.session.add(employee)
         db.session.commit()
+        invalidate_employee_cache()
         return employee.to_dict()
     except Exception as e:
-        print(f"Error creating employee: {e}")
+        current_app.logger.error("Error creating employee: %s", e)
+        db.session.rollback()
+        return None
+
+def create_employees(employees_data):
+    """Create many employees in one executemany INSERT (sample data, scripted loads)"""
+    try:
+        rows = [Employee.to_mapping(data) for data in employees_data]
+        db.session.execute(db.insert(Employee), rows)
+        db.session.commit()
+        invalidate_employee_cache()
+        return rows
+    except Exception as e:
+        current_app.logger.error("Error creating employees: %s", e)
         db.session.rollback()
         return None
 
 def update_employee(employee_id, employee_data):
     """Update existing employee"""
     try:
-        employee = Employee.query.get(employee_id)
-        if not employee:
-            return None
-        
-        for key, value in employee_data.items():
-            if key != 'id' and hasattr(employee, key):
-                if key == 'badges':
-                    setattr(employee, key, json.dumps(value))
-                else:
-                    setattr(employee, key, value)
+        values = {key: value for key, value in employee_data.items() if key != 'id' and key in Employee.__table__.c}
+        if not values:
+            return get_employee(employee_id)
         
+        employee = db.session.execute(
+            db.update(Employee).where(Employee.id == employee_id).values(**values).returning(Employee)
+        ).scalar()
+        result = employee.to_dict() if employee else None
         db.session.commit()
-        return employee.to_dict()
+        invalidate_employee_cache()
+        return result
     except Exception as e:
-        print(f"Error updating employee {employee_id}: {e}")
+        current_app.logger.error("Error updating employee %s: %s", employee_id, e)
         db.session.rollback()
         return None
 
 def delete_employee(employee_id):
     """Delete employee"""
     try:
-        employee = Employee.query.get(employee_id)
-        if employee:
-            db.session.delete(employee)
-            db.session.commit()
-            return True
-        return False
+        deleted = db.session.execute(db.delete(Employee).where(Employee.id == employee_id)).rowcount
+        db.session.commit()
+        invalidate_employee_cache()
+        return deleted > 0
     except Exception as e:
-        print(f"Error deleting employee {employee_id}: {e}")
+        current_app.logger.error("Error deleting employee %s: %s", employee_id, e)
         db.session.rollback()
         return False
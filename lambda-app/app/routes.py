@@ -2,15 +2,16 @@
 Flask routes for Employee Directory
 Optimized for AWS Lambda deployment
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
-from .models import get_employees, get_employee, create_employee, update_employee, delete_employee
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash, jsonify
+from werkzeug.exceptions import HTTPException
+from .models import get_employees, get_employees_json, get_employee, create_employee, update_employee, delete_employee
 from . import limiter
-import json
+from types import MappingProxyType
 
 main_bp = Blueprint('main', __name__)
 
 # Available badges for the application
-BADGES = {
+BADGES = MappingProxyType({
     'apple': 'Mac User',
     'windows': 'Windows User',
     'linux': 'Linux User',
@@ -23,17 +24,57 @@ BADGES = {
     'gamepad': 'Gamer',
     'bug': 'Bugfixer',
     'umbrella': 'Seattle Fan'
-}
+})
+
+@main_bp.record_once
+def register_template_globals(state):
+    """Expose the read-only badge table to every template once, not per render"""
+    state.app.jinja_env.globals['badges'] = BADGES
+
+def parse_employee_form(form):
+    """Read and clean the employee form in one pass; None when a required field is blank"""
+    fullname = form.get('fullname', '').strip()
+    location = form.get('location', '').strip()
+    job_title = form.get('job_title', '').strip()
+    if not (fullname and location and job_title):
+        return None
+    badges = form.get('badges', '')
+    return {
+        'fullname': fullname,
+        'location': location,
+        'job_title': job_title,
+        'badges': list(filter(None, map(str.strip, badges.split(',')))) if badges else []
+    }
+
+@main_bp.errorhandler(Exception)
+def handle_unexpected_error(e):
+    """Turn an unexpected error in any view into a JSON 500 (API) or a flash and redirect home"""
+    # 404s, 405s and rate-limit 429s keep their normal responses. The exception text
+    # can carry SQL and driver details, so it only goes to the log
+    if isinstance(e, HTTPException):
+        return e
+    current_app.logger.error("Unhandled error on %s: %s", request.path, e, exc_info=e)
+    if request.path.startswith('/api/'):
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+    if request.endpoint == 'main.home':
+        # Redirecting home from home would loop; leave it to Flask's 500 response
+        raise e
+    flash('An error occurred', 'error')
+    return redirect(url_for('main.home'))
 
 @main_bp.route('/')
 def home():
     """Home page with employee list"""
     try:
         employees = get_employees()
-        return render_template('main.html', employees=employees, badges=BADGES)
+        return render_template('main.html', employees=employees)
     except Exception as e:
-        flash(f'Error loading employees: {str(e)}', 'error')
-        return render_template('main.html', employees=[], badges=BADGES)
+        current_app.logger.error("Error loading employees: %s", e, exc_info=e)
+        flash('Error loading employees', 'error')
+        return render_template('main.html', employees=[])
 
 @main_bp.route('/add', methods=['GET', 'POST'])
 @limiter.limit("10 per minute")
@@ -41,21 +82,11 @@ def add():
     """Add new employee"""
     if request.method == 'POST':
         try:
-            # Get form data
-            employee_data = {
-                'fullname': request.form.get('fullname', '').strip(),
-                'location': request.form.get('location', '').strip(),
-                'job_title': request.form.get('job_title', '').strip(),
-                'badges': request.form.get('badges', '').split(',') if request.form.get('badges') else []
-            }
-            
-            # Validate required fields
-            if not employee_data['fullname'] or not employee_data['location'] or not employee_data['job_title']:
+            # Get and validate form data
+            employee_data = parse_employee_form(request.form)
+            if employee_data is None:
                 flash('All fields are required', 'error')
-                return render_template('add-edit.html', employee=None, title='Add Employee', badges=BADGES)
-            
-            # Clean up badges
-            employee_data['badges'] = [badge.strip() for badge in employee_data['badges'] if badge.strip()]
+                return render_template('add-edit.html', employee=None, title='Add Employee')
             
             # Create employee
             result = create_employee(employee_data)
@@ -65,116 +96,87 @@ def add():
             else:
                 flash('Error adding employee', 'error')
         except Exception as e:
-            flash(f'Error adding employee: {str(e)}', 'error')
+            current_app.logger.error("Error adding employee: %s", e, exc_info=e)
+            flash('Error adding employee', 'error')
     
-    return render_template('add-edit.html', employee=None, title='Add Employee', badges=BADGES)
+    return render_template('add-edit.html', employee=None, title='Add Employee')
 
 @main_bp.route('/view/<employee_id>')
 def view(employee_id):
     """View employee details"""
-    try:
-        employee = get_employee(employee_id)
-        if employee:
-            return render_template('view-edit.html', employee=employee, badges=BADGES)
-        else:
-            flash('Employee not found', 'error')
-            return redirect(url_for('main.home'))
-    except Exception as e:
-        flash(f'Error viewing employee: {str(e)}', 'error')
+    employee = get_employee(employee_id)
+    if employee:
+        return render_template('view-edit.html', employee=employee)
+    else:
+        flash('Employee not found', 'error')
         return redirect(url_for('main.home'))
 
 @main_bp.route('/edit/<employee_id>', methods=['GET', 'POST'])
 @limiter.limit("10 per minute")
 def edit(employee_id):
     """Edit existing employee"""
-    try:
-        employee = get_employee(employee_id)
-        if not employee:
-            flash('Employee not found', 'error')
-            return redirect(url_for('main.home'))
-        
-        if request.method == 'POST':
-            # Get form data
-            employee_data = {
-                'fullname': request.form.get('fullname', '').strip(),
-                'location': request.form.get('location', '').strip(),
-                'job_title': request.form.get('job_title', '').strip(),
-                'badges': request.form.get('badges', '').split(',') if request.form.get('badges') else []
-            }
-            
-            # Validate required fields
-            if not employee_data['fullname'] or not employee_data['location'] or not employee_data['job_title']:
-                flash('All fields are required', 'error')
-                return render_template('add-edit.html', employee=employee, title='Edit Employee', badges=BADGES)
-            
-            # Clean up badges
-            employee_data['badges'] = [badge.strip() for badge in employee_data['badges'] if badge.strip()]
-            
-            # Update employee
+    error = None
+    if request.method == 'POST':
+        # Get and validate form data
+        employee_data = parse_employee_form(request.form)
+        if employee_data is None:
+            error = 'All fields are required'
+        else:
+            # Update employee - no lookup first, update_employee returns None when no row matches
             result = update_employee(employee_id, employee_data)
             if result:
                 flash('Employee updated successfully!', 'success')
                 return redirect(url_for('main.view', employee_id=employee_id))
-            else:
-                flash('Error updating employee', 'error')
-        
-        return render_template('add-edit.html', employee=employee, title='Edit Employee', badges=BADGES)
-        
-    except Exception as e:
-        flash(f'Error editing employee: {str(e)}', 'error')
+            error = 'Error updating employee'
+    
+    # Only the form render (GET, or a POST that failed) needs the current record
+    employee = get_employee(employee_id)
+    if not employee:
+        flash('Employee not found', 'error')
         return redirect(url_for('main.home'))
+    
+    if error:
+        flash(error, 'error')
+    return render_template('add-edit.html', employee=employee, title='Edit Employee')
 
 @main_bp.route('/delete/<employee_id>', methods=['POST'])
 @limiter.limit("5 per minute")
 def delete(employee_id):
     """Delete employee"""
-    try:
-        result = delete_employee(employee_id)
-        if result:
-            flash('Employee deleted successfully!', 'success')
-        else:
-            flash('Error deleting employee', 'error')
-    except Exception as e:
-        flash(f'Error deleting employee: {str(e)}', 'error')
+    result = delete_employee(employee_id)
+    if result:
+        flash('Employee deleted successfully!', 'success')
+    else:
+        flash('Error deleting employee', 'error')
     
     return redirect(url_for('main.home'))
 
+# Success envelopes around the JSON text that get_employees_json() and
+# current_app.json.dumps() return
+API_ENVELOPE_HEAD = '{"data":'
+API_ITEM_TAIL = ',"success":true}\n'
+API_LIST_TAIL = ',"success":true,"total":%d}\n'
+
 # API endpoints for future use
 @main_bp.route('/api/employees')
 @limiter.limit("100 per hour")
 def api_employees():
     """API endpoint to get all employees"""
-    try:
-        employees = get_employees()
-        return jsonify({
-            'success': True,
-            'data': employees,
-            'total': len(employees)
-        })
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    # The database hands back the serialized list; only the envelope is added here
+    employees_json, total = get_employees_json()
+    body = API_ENVELOPE_HEAD + employees_json + API_LIST_TAIL % total
+    return current_app.response_class(body, mimetype='application/json')
 
 @main_bp.route('/api/employees/<employee_id>')
 @limiter.limit("100 per hour")
 def api_employee(employee_id):
     """API endpoint to get specific employee"""
-    try:
-        employee = get_employee(employee_id)
-        if employee:
-            return jsonify({
-                'success': True,
-                'data': employee
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'error': 'Employee not found'
-            }), 404
-    except Exception as e:
+    employee = get_employee(employee_id)
+    if employee:
+        return current_app.response_class(API_ENVELOPE_HEAD + current_app.json.dumps(employee) + API_ITEM_TAIL,
+                                          mimetype='application/json')
+    else:
         return jsonify({
             'success': False,
-            'error': str(e)
-        }), 500
+            'error': 'Employee not found'
+        }), 404
@@ -123,6 +123,14 @@ fi
 echo -e "${GREEN}✅ Environment variables configured${NC}"
 echo ""
 
+# Precompile bytecode so cold starts load .pyc files instead of compiling sources.
+# The interpreter tags each file with its version, so this only helps when the
+# local python3 matches the Lambda runtime; mismatched files are simply ignored.
+echo -e "${BLUE}⚙️  Precompiling Python bytecode...${NC}"
+python3 -m compileall -q handler.py static.py app
+echo -e "${GREEN}✅ Bytecode compiled${NC}"
+echo ""
+
 # Deploy the application
 echo -e "${BLUE}🚀 Deploying application...${NC}"
 serverless deploy --stage "$STAGE" --region "$REGION" --verbose
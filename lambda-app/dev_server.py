@@ -27,13 +27,21 @@ def main():
         # Create Flask app
         app = create_app()
         
-        # Run the development server
-        app.run(
-            host='127.0.0.1',
-            port=8080,
-            debug=False,  # Production setting - no debug mode
-            use_reloader=False  # Disable reloader to avoid issues
-        )
+        # Run the development server with a thread pool so concurrent requests overlap
+        # their DB I/O the way concurrent Lambda invocations do. waitress is a dev-only
+        # dependency (it stays out of the Lambda package); fall back to threaded Werkzeug
+        try:
+            from waitress import serve
+        except ImportError:
+            app.run(
+                host='127.0.0.1',
+                port=8080,
+                debug=False,  # Production setting - no debug mode
+                use_reloader=False,  # Disable reloader to avoid issues
+                threaded=True
+            )
+        else:
+            serve(app, host='127.0.0.1', port=8080, threads=8, connection_limit=200, channel_timeout=30)
         
     except ImportError as e:
         print(f"❌ Import error: {e}")
@@ -2,19 +2,75 @@
 Lambda handler for Employee Directory Application
 Uses Mangum to adapt Flask app for AWS Lambda
 """
-import json
 import os
+import orjson
 from mangum import Mangum
-from app import create_app
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy.pool import NullPool
+from app import create_app, db
 
 # Create Flask app once (singleton pattern for cold start optimization)
 app = create_app()
 
-# Create Mangum handler for Lambda
-handler = Mangum(app, lifespan="off")
+# Open one pooled connection during init so the first request doesn't pay the
+# connect + TLS handshake. NullPool (the Lambda default, DB_NULL_POOL) closes the
+# connection again as soon as it is released, so there is nothing to warm then.
+# A missing database shouldn't stop the module loading.
+try:
+    with app.app_context():
+        if not isinstance(db.engine.pool, NullPool):
+            with db.engine.connect() as conn:
+                conn.execute(db.text('SELECT 1'))
+except Exception as e:
+    app.logger.warning("Database warm-up failed: %s", e)
+
+# Create Mangum handler for Lambda - Mangum speaks ASGI, so wrap the WSGI app
+asgi_app = WsgiToAsgi(app)
+handler = Mangum(asgi_app, lifespan="off")
+
+# Environment-derived settings don't change within a container, so read them once at cold start
+ALLOWED_ORIGINS = os.getenv('ALLOWED_ORIGINS', 'http://localhost:3000,http://localhost:8080').split(',')
+ALLOWED_ORIGIN_SET = frozenset(ALLOWED_ORIGINS)
+DEFAULT_ORIGIN = ALLOWED_ORIGINS[0] if ALLOWED_ORIGINS else ''
+IS_DEVELOPMENT = os.getenv('ENVIRONMENT') == 'development'
+
+# CORS and security headers added to every response
+RESPONSE_HEADERS = {
+    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Requested-With',
+    'Access-Control-Allow-Credentials': 'true',
+    'X-Content-Type-Options': 'nosniff',
+    'X-Frame-Options': 'DENY',
+    'X-XSS-Protection': '1; mode=block',
+    'Referrer-Policy': 'strict-origin-when-cross-origin',
+    'Strict-Transport-Security': 'max-age=31536000; includeSubDomains'
+}
+
+# CORS preflights carry no business logic, so answer them without going through Flask;
+# Max-Age lets the browser reuse the answer instead of asking again for a day
+PREFLIGHT_HEADERS = {
+    **RESPONSE_HEADERS,
+    'Access-Control-Max-Age': '86400'
+}
+
+def resolve_origin(event):
+    """Pick the Access-Control-Allow-Origin value for a request"""
+    origin = (event.get('headers') or {}).get('origin', '')
+    if origin in ALLOWED_ORIGIN_SET or IS_DEVELOPMENT:
+        return origin
+    return DEFAULT_ORIGIN
 
 def lambda_handler(event, context):
     """Lambda function handler"""
+    # REST API (v1) events carry httpMethod, HTTP API (v2) events put it under requestContext.http
+    method = event.get('httpMethod') or (event.get('requestContext') or {}).get('http', {}).get('method')
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 204,
+            'headers': {**PREFLIGHT_HEADERS, 'Access-Control-Allow-Origin': resolve_origin(event)},
+            'body': ''
+        }
+    
     try:
         # Process the request through Flask app
         response = handler(event, context)
@@ -28,24 +84,10 @@ def lambda_handler(event, context):
             response['headers']['Cache-Control'] = 'public, max-age=31536000'
         
         # Add CORS headers - restrict to specific origins in production
-        allowed_origins = os.getenv('ALLOWED_ORIGINS', 'http://localhost:3000,http://localhost:8080').split(',')
-        origin = event.get('headers', {}).get('origin', '')
-        
-        if origin in allowed_origins or os.getenv('ENVIRONMENT') == 'development':
-            response['headers']['Access-Control-Allow-Origin'] = origin
-        else:
-            response['headers']['Access-Control-Allow-Origin'] = allowed_origins[0] if allowed_origins else ''
-            
-        response['headers']['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-        response['headers']['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Requested-With'
-        response['headers']['Access-Control-Allow-Credentials'] = 'true'
+        response['headers']['Access-Control-Allow-Origin'] = resolve_origin(event)
         
-        # Add security headers
-        response['headers']['X-Content-Type-Options'] = 'nosniff'
-        response['headers']['X-Frame-Options'] = 'DENY'
-        response['headers']['X-XSS-Protection'] = '1; mode=block'
-        response['headers']['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-        response['headers']['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
+        # Add CORS and security headers
+        response['headers'].update(RESPONSE_HEADERS)
         
         return response
         
@@ -55,10 +97,10 @@ def lambda_handler(event, context):
             'statusCode': 500,
             'headers': {
                 'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': os.getenv('ALLOWED_ORIGINS', 'http://localhost:3000').split(',')[0]
+                'Access-Control-Allow-Origin': DEFAULT_ORIGIN
             },
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'error': 'Internal server error',
-                'message': 'An unexpected error occurred' if os.getenv('ENVIRONMENT') != 'development' else str(e)
-            })
+                'message': str(e) if IS_DEVELOPMENT else 'An unexpected error occurred'
+            }).decode()
         }
@@ -6,7 +6,11 @@ Migrates data from SQLite to Aurora Serverless PostgreSQL
 
 import sqlite3
 import psycopg2
-import json
+from psycopg2.extras import execute_values
+import orjson
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 import os
 import sys
 from urllib.parse import urlparse
@@ -15,7 +19,6 @@ def connect_sqlite(db_path):
     """Connect to SQLite database"""
     try:
         conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
         return conn
     except Exception as e:
         print(f"Error connecting to SQLite: {e}")
@@ -31,7 +34,7 @@ def connect_postgres(database_url):
         return None
 
 def get_sqlite_data(sqlite_conn):
-    """Extract data from SQLite database"""
+    """Report the SQLite schema and return the number of employees to migrate"""
     try:
         cursor = sqlite_conn.cursor()
         
@@ -40,33 +43,46 @@ def get_sqlite_data(sqlite_conn):
         schema = cursor.fetchone()
         print(f"SQLite schema: {schema[0] if schema else 'No schema found'}")
         
-        # Get employee data
-        cursor.execute("SELECT * FROM employees")
-        employees = cursor.fetchall()
-        
-        print(f"Found {len(employees)} employees in SQLite")
-        
-        # Convert to list of dictionaries
-        employee_data = []
-        for emp in employees:
-            employee_dict = dict(emp)
-            # Parse badges JSON if it exists
-            if employee_dict.get('badges'):
-                try:
-                    badges = json.loads(employee_dict['badges'])
-                    employee_dict['badges'] = badges
-                except json.JSONDecodeError:
-                    employee_dict['badges'] = []
-            else:
-                employee_dict['badges'] = []
-            
-            employee_data.append(employee_dict)
+        cursor.execute("SELECT COUNT(*) FROM employees")
+        count = cursor.fetchone()[0]
         
-        return employee_data
+        print(f"Found {count} employees in SQLite")
+        return count
         
     except Exception as e:
         print(f"Error extracting data from SQLite: {e}")
-        return []
+        return 0
+
+def iter_sqlite_data(sqlite_conn, batch_size=1000, partition=None):
+    """Yield employee dicts from SQLite in fetchmany batches, so memory stays flat
+    
+    partition is an optional (index, count) pair that limits the rows to every
+    count-th rowid, so parallel workers each read a disjoint slice.
+    """
+    cursor = sqlite_conn.cursor()
+    if partition is None:
+        cursor.execute("SELECT id, fullname, location, job_title, badges FROM employees")
+    else:
+        index, count = partition
+        cursor.execute("SELECT id, fullname, location, job_title, badges FROM employees WHERE rowid % ? = ?",
+                       (count, index))
+    while True:
+        chunk = cursor.fetchmany(batch_size)
+        if not chunk:
+            return
+        for id_, fullname, location, job_title, badges in chunk:
+            # Parse badges JSON if it exists
+            try:
+                badges = orjson.loads(badges) if badges else []
+            except orjson.JSONDecodeError:
+                badges = []
+            yield {
+                'id': id_,
+                'fullname': fullname,
+                'location': location,
+                'job_title': job_title,
+                'badges': badges,
+            }
 
 def create_postgres_schema(postgres_conn):
     """Create PostgreSQL schema"""
@@ -80,11 +96,12 @@ def create_postgres_schema(postgres_conn):
             fullname VARCHAR(100) NOT NULL,
             location VARCHAR(100) NOT NULL,
             job_title VARCHAR(100) NOT NULL,
-            badges TEXT
+            badges JSONB
         );
         """
         
         cursor.execute(create_table_sql)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_employees_badges ON employees USING gin (badges)")
         postgres_conn.commit()
         print("PostgreSQL schema created successfully")
         
@@ -92,39 +109,68 @@ def create_postgres_schema(postgres_conn):
         print(f"Error creating PostgreSQL schema: {e}")
         postgres_conn.rollback()
 
-def insert_postgres_data(postgres_conn, employees):
-    """Insert data into PostgreSQL"""
+def clear_postgres_data(postgres_conn):
+    """Delete and commit the existing PostgreSQL rows ahead of a parallel load"""
+    cursor = postgres_conn.cursor()
+    cursor.execute("DELETE FROM employees")
+    postgres_conn.commit()
+    print("Cleared existing PostgreSQL data")
+
+def insert_postgres_data(postgres_conn, employees, batch_size=1000, clear=True):
+    """Insert an iterable of employee dicts into PostgreSQL, returning the row count"""
     try:
         cursor = postgres_conn.cursor()
         
         # Clear existing data
-        cursor.execute("DELETE FROM employees")
-        print("Cleared existing PostgreSQL data")
+        if clear:
+            cursor.execute("DELETE FROM employees")
+            print("Cleared existing PostgreSQL data")
         
-        # Insert new data
+        # Insert new data as multi-row INSERTs, one batch of rows in memory at a time, in
+        # the same transaction as the DELETE so a failure leaves the old data in place
         insert_sql = """
         INSERT INTO employees (id, fullname, location, job_title, badges)
-        VALUES (%s, %s, %s, %s, %s)
+        VALUES %s
         """
-        
-        for emp in employees:
-            cursor.execute(insert_sql, (
-                emp['id'],
-                emp['fullname'],
-                emp['location'],
-                emp['job_title'],
-                json.dumps(emp['badges'])
-            ))
+        rows = (
+            (emp['id'], emp['fullname'], emp['location'], emp['job_title'], orjson.dumps(emp['badges']).decode())
+            for emp in employees
+        )
+        inserted = 0
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            # page_size matches the batch, so this is a single statement and rowcount covers it all
+            execute_values(cursor, insert_sql, batch, template="(%s, %s, %s, %s, %s::jsonb)", page_size=batch_size)
+            inserted += cursor.rowcount
         
         postgres_conn.commit()
-        print(f"Successfully inserted {len(employees)} employees into PostgreSQL")
+        print(f"Successfully inserted {inserted} employees into PostgreSQL")
+        return inserted
         
     except Exception as e:
         print(f"Error inserting data into PostgreSQL: {e}")
         postgres_conn.rollback()
+        return 0
+
+def migrate_partition(sqlite_path, database_url, partition, batch_size=1000):
+    """Copy one rowid partition over its own pair of connections (runs in a worker process)"""
+    sqlite_conn = connect_sqlite(sqlite_path)
+    postgres_conn = connect_postgres(database_url)
+    try:
+        if not sqlite_conn or not postgres_conn:
+            return 0
+        return insert_postgres_data(postgres_conn, iter_sqlite_data(sqlite_conn, batch_size, partition),
+                                    batch_size, clear=False)
+    finally:
+        if sqlite_conn:
+            sqlite_conn.close()
+        if postgres_conn:
+            postgres_conn.close()
 
 def verify_migration(postgres_conn, expected_count):
-    """Verify the migration was successful"""
+    """Re-count the migrated table; a full scan, so only run when --verify is given"""
     try:
         cursor = postgres_conn.cursor()
         cursor.execute("SELECT COUNT(*) FROM employees")
@@ -143,17 +189,30 @@ def verify_migration(postgres_conn, expected_count):
 
 def main():
     """Main migration function"""
+    parser = argparse.ArgumentParser(description="Migrate employees from SQLite to PostgreSQL")
+    parser.add_argument('--sqlite', default="../directory-frontend/app/employees.db",
+                        help="path to the SQLite database (default: %(default)s)")
+    parser.add_argument('--pg-url', default=os.getenv('DATABASE_URL'),
+                        help="PostgreSQL connection string (default: $DATABASE_URL)")
+    parser.add_argument('--yes', action='store_true',
+                        help="skip the confirmation prompt")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="parallel insert streams, each with its own connections (default: %(default)s)")
+    parser.add_argument('--verify', action='store_true',
+                        help="re-count the PostgreSQL table with SELECT COUNT(*) after inserting")
+    args = parser.parse_args()
+    
     print("🚀 Employee Directory Data Migration")
     print("====================================")
     
     # Configuration
-    sqlite_path = input("Enter path to SQLite database (default: ../directory-frontend/app/employees.db): ").strip()
-    if not sqlite_path:
-        sqlite_path = "../directory-frontend/app/employees.db"
-    
-    database_url = input("Enter PostgreSQL connection string: ").strip()
+    sqlite_path = args.sqlite
+    database_url = args.pg_url
     if not database_url:
-        print("❌ PostgreSQL connection string is required")
+        print("❌ PostgreSQL connection string is required (--pg-url or DATABASE_URL)")
+        sys.exit(1)
+    if args.workers < 1:
+        print("❌ --workers must be at least 1")
         sys.exit(1)
     
     # Validate connection strings
@@ -170,12 +229,14 @@ def main():
     print(f"\n📊 Migration Configuration:")
     print(f"SQLite: {sqlite_path}")
     print(f"PostgreSQL: {database_url.split('@')[1] if '@' in database_url else 'Invalid URL'}")
+    print(f"Workers: {args.workers}")
     
     # Confirm migration
-    confirm = input("\nProceed with migration? (y/N): ").strip().lower()
-    if confirm != 'y':
-        print("Migration cancelled")
-        sys.exit(0)
+    if not args.yes:
+        confirm = input("\nProceed with migration? (y/N): ").strip().lower()
+        if confirm != 'y':
+            print("Migration cancelled")
+            sys.exit(0)
     
     print("\n🔄 Starting migration...")
     
@@ -196,8 +257,8 @@ def main():
     try:
         # Extract data from SQLite
         print("\n📥 Extracting data from SQLite...")
-        employees = get_sqlite_data(sqlite_conn)
-        if not employees:
+        employee_count = get_sqlite_data(sqlite_conn)
+        if not employee_count:
             print("❌ No data found in SQLite")
             sys.exit(1)
         
@@ -207,13 +268,32 @@ def main():
         
         # Insert data into PostgreSQL
         print("\n📤 Inserting data into PostgreSQL...")
-        insert_postgres_data(postgres_conn, employees)
+        if args.workers == 1:
+            inserted = insert_postgres_data(postgres_conn, iter_sqlite_data(sqlite_conn))
+        else:
+            # Each worker commits its own slice, so unlike the single-stream load the
+            # DELETE is committed up front and a failed worker leaves a partial table
+            clear_postgres_data(postgres_conn)
+            with ProcessPoolExecutor(max_workers=args.workers) as executor:
+                counts = executor.map(migrate_partition,
+                                      [sqlite_path] * args.workers,
+                                      [database_url] * args.workers,
+                                      [(index, args.workers) for index in range(args.workers)])
+                inserted = sum(counts)
         
-        # Verify migration
+        # Verify migration - the INSERT row counts already say how many rows landed, so
+        # the extra COUNT(*) scan is opt-in
         print("\n✅ Verifying migration...")
-        if verify_migration(postgres_conn, len(employees)):
+        if inserted != employee_count:
+            print(f"❌ Migration verification failed: expected {employee_count}, inserted {inserted}")
+            verified = False
+        else:
+            print(f"✅ Inserted {inserted} employees")
+            verified = not args.verify or verify_migration(postgres_conn, employee_count)
+        
+        if verified:
             print("\n🎉 Migration completed successfully!")
-            print(f"   {len(employees)} employees migrated")
+            print(f"   {employee_count} employees migrated")
             print("\nNext steps:")
             print("1. Update your DATABASE_URL environment variable")
             print("2. Test the application with the new database")
@@ -5,26 +5,22 @@ Handles file uploads and processing
 import json
 import boto3
 import os
+import mimetypes
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
 
-s3 = boto3.client('s3')
+# Records are handled on a thread pool (boto3 releases the GIL while waiting on S3),
+# so give the client enough pooled connections for every worker; both persist across warm invocations
+S3_WORKERS = 16
+s3 = boto3.client('s3', config=Config(max_pool_connections=S3_WORKERS * 2))
+EXECUTOR = ThreadPoolExecutor(max_workers=S3_WORKERS)
 
 def handler(event, context):
     """Handle S3 events for static assets"""
     try:
-        for record in event['Records']:
-            bucket = record['s3']['bucket']['name']
-            key = record['s3']['object']['key']
-            event_name = record['eventName']
-            
-            print(f"Processing {event_name} for {bucket}/{key}")
-            
-            if event_name.startswith('ObjectCreated'):
-                # Handle new file upload
-                process_new_file(bucket, key)
-            elif event_name.startswith('ObjectRemoved'):
-                # Handle file deletion
-                process_file_deletion(bucket, key)
-                
+        # Records' copy_object round trips overlap with each other
+        list(EXECUTOR.map(process_record, event['Records']))
+        
         return {
             'statusCode': 200,
             'body': json.dumps('Static asset processed successfully')
@@ -37,15 +33,27 @@ def handler(event, context):
             'body': json.dumps(f'Error: {str(e)}')
         }
 
+def process_record(record):
+    """Dispatch a single S3 event record"""
+    bucket = record['s3']['bucket']['name']
+    key = record['s3']['object']['key']
+    event_name = record['eventName']
+    
+    print(f"Processing {event_name} for {bucket}/{key}")
+    
+    if event_name.startswith('ObjectCreated'):
+        # Handle new file upload
+        process_new_file(bucket, key)
+    elif event_name.startswith('ObjectRemoved'):
+        # Handle file deletion
+        process_file_deletion(bucket, key)
+
 def process_new_file(bucket, key):
     """Process newly uploaded static file"""
     try:
-        # Get file metadata
-        response = s3.head_object(Bucket=bucket, Key=key)
-        content_type = response.get('ContentType', 'application/octet-stream')
-        
-        # Set appropriate cache headers based on file type
-        cache_control = get_cache_control(key, content_type)
+        # Headers come from the key's extension, so a single copy_object rewrites them
+        # without a head_object round trip to read the current ContentType
+        cache_control, content_type = get_asset_headers(key)
         
         # Update object with cache headers
         s3.copy_object(
@@ -67,13 +75,23 @@ def process_file_deletion(bucket, key):
     print(f"File deleted: {bucket}/{key}")
     # Could implement cache invalidation here if needed
 
-def get_cache_control(key, content_type):
-    """Determine appropriate cache control headers"""
-    if key.endswith('.css') or key.endswith('.js'):
-        return 'public, max-age=31536000'  # 1 year for CSS/JS
-    elif key.endswith('.png') or key.endswith('.jpg') or key.endswith('.gif'):
-        return 'public, max-age=2592000'   # 30 days for images
-    elif key.endswith('.ico'):
-        return 'public, max-age=31536000'  # 1 year for favicon
-    else:
-        return 'public, max-age=3600'      # 1 hour default
+# (Cache-Control, Content-Type) by file extension; anything else gets DEFAULT_CACHE_CONTROL
+# and a type guessed from the extension
+ASSET_HEADERS_BY_EXTENSION = {
+    '.css': ('public, max-age=31536000', 'text/css'),  # 1 year for CSS/JS
+    '.js': ('public, max-age=31536000', 'application/javascript'),
+    '.png': ('public, max-age=2592000', 'image/png'),   # 30 days for images
+    '.jpg': ('public, max-age=2592000', 'image/jpeg'),
+    '.gif': ('public, max-age=2592000', 'image/gif'),
+    '.ico': ('public, max-age=31536000', 'image/x-icon')   # 1 year for favicon
+}
+DEFAULT_CACHE_CONTROL = 'public, max-age=3600'  # 1 hour default
+DEFAULT_CONTENT_TYPE = 'application/octet-stream'
+
+def get_asset_headers(key):
+    """Determine the cache control and content type headers for a key"""
+    ext = os.path.splitext(key)[1].lower()
+    headers = ASSET_HEADERS_BY_EXTENSION.get(ext)
+    if headers is None:
+        headers = (DEFAULT_CACHE_CONTROL, mimetypes.guess_type(key)[0] or DEFAULT_CONTENT_TYPE)
+    return headers